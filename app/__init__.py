@@ -1,3 +1,4 @@
+import os
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
@@ -5,7 +6,14 @@ from flask_login import LoginManager
 db = SQLAlchemy()
 login_manager = LoginManager()
 
-def create_app():
+def create_app(config=None, register_views=True):
+    """Build the app.
+
+    Command-line scripts pass register_views=False so they skip importing the
+    routes, the login throttle and live events, and setting up templates,
+    which only the web workers need. Views reach the throttle and event
+    broker through app.extensions.
+    """
     app = Flask(__name__)
     
     # Secret key for sessions
@@ -17,6 +25,12 @@ def create_app():
     )
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     
+    # Compiled templates are cached here; fill it at deploy time with warmup.py --precompile
+    app.config['JINJA_BYTECODE_CACHE_DIR'] = os.path.join(app.instance_path, 'jinja_cache')
+    
+    if config:
+        app.config.update(config)
+    
     # Initialize extensions
     db.init_app(app)
     login_manager.init_app(app)
@@ -29,8 +43,29 @@ def create_app():
         from .models import User
         return User.query.get(int(user_id))
     
+    if not register_views:
+        return app
+    
+    from jinja2 import FileSystemBytecodeCache
+    from .throttle import LoginThrottle
+    from .events import EventBroker
+    
+    LoginThrottle(app)
+    EventBroker(app)
+    
+    cache_dir = app.config.get('JINJA_BYTECODE_CACHE_DIR')
+    if cache_dir:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            app.jinja_env.bytecode_cache = FileSystemBytecodeCache(cache_dir)
+        except OSError as e:
+            # The cache only speeds up startup; run without it rather than fail the worker
+            app.logger.warning(f"Template bytecode cache disabled ({cache_dir}): {e}")
+    
     # Register blueprints
     from .routes import main_bp
+    from .api import api_bp
     app.register_blueprint(main_bp)
+    app.register_blueprint(api_bp)
     
     return app
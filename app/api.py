@@ -0,0 +1,332 @@
+import base64
+import hashlib
+import secrets
+from datetime import datetime, date, timedelta, timezone
+from functools import wraps
+from flask import Blueprint, Response, request, jsonify, g
+from . import db
+from .models import Patient, Appointment, ApiToken, DeletedRecord
+
+api_bp = Blueprint('api_v1', __name__, url_prefix='/api/v1')
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 500
+BATCH_MAX_IDS = 100
+TOKEN_TOUCH_INTERVAL = timedelta(minutes=5)
+# updated_at is stamped before commit and deleted_at at transaction start, so a row
+# can become visible with a stamp older than rows already synced. Sync pages leave
+# out the most recent stamps until transactions that old have committed.
+SYNC_SETTLE = timedelta(seconds=5)
+
+# Fields a client may request with ?fields=; id and updated_at are always returned
+RESOURCES = {
+    'patients': (Patient, (
+        'id', 'patient_id', 'first_name', 'last_name', 'date_of_birth', 'gender',
+        'phone', 'email', 'address', 'emergency_contact', 'emergency_phone',
+        'blood_type', 'allergies', 'medical_notes', 'created_at', 'updated_at',
+    )),
+    'appointments': (Appointment, (
+        'id', 'patient_id', 'patient_name', 'patient_email', 'patient_phone',
+        'appointment_date', 'appointment_time', 'doctor', 'department', 'reason',
+        'status', 'notes', 'created_at', 'updated_at',
+    )),
+}
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+@api_bp.errorhandler(ApiError)
+def handle_api_error(e):
+    return jsonify({'error': e.message}), e.status
+
+
+@api_bp.errorhandler(404)
+def handle_not_found(e):
+    return jsonify({'error': 'Not found.'}), 404
+
+
+def hash_token(token):
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def generate_token():
+    """Return a new random token; store only hash_token(token)."""
+    return secrets.token_urlsafe(32)
+
+
+def token_required(view):
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        header = request.headers.get('Authorization', '')
+        scheme, _, token = header.partition(' ')
+        if scheme.lower() != 'bearer' or not token:
+            raise ApiError('Missing bearer token.', 401)
+        api_token = ApiToken.query.filter_by(token_hash=hash_token(token.strip()), is_active=True).first()
+        if api_token is None:
+            raise ApiError('Invalid or revoked token.', 401)
+        now = datetime.utcnow()
+        # Record usage without turning every read into a write
+        if api_token.last_used_at is None or now - api_token.last_used_at > TOKEN_TOUCH_INTERVAL:
+            api_token.last_used_at = now
+            db.session.commit()
+        g.api_token = api_token
+        return view(*args, **kwargs)
+    return wrapped
+
+
+def serialize(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def selected_fields(resource):
+    """Columns to load for ?fields=a,b (sparse fieldset); all fields when omitted."""
+    model, allowed = RESOURCES[resource]
+    requested = request.args.get('fields', '')
+    if not requested:
+        names = list(allowed)
+    else:
+        names = [name.strip() for name in requested.split(',') if name.strip()]
+        unknown = sorted(set(names) - set(allowed))
+        if unknown:
+            raise ApiError(f"Unknown field(s) for {resource}: {', '.join(unknown)}. "
+                           f"Allowed: {', '.join(allowed)}.")
+    for required in ('updated_at', 'id'):
+        if required not in names:
+            names.insert(0, required)
+    return names, [getattr(model, name) for name in names]
+
+
+def to_dict(names, row):
+    return {name: serialize(value) for name, value in zip(names, row)}
+
+
+def modified_since():
+    """If-Modified-Since as a naive UTC datetime (updated_at is stored that way), or None."""
+    since = request.if_modified_since
+    if since is None:
+        return None
+    if since.tzinfo is not None:
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+    return since
+
+
+def not_modified(last_modified):
+    response = Response(status=304)
+    if last_modified:
+        response.last_modified = last_modified
+    return response
+
+
+def encode_cursor(updated_at, row_id):
+    raw = f"{updated_at.isoformat() if updated_at else ''}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        stamp, _, row_id = raw.partition('|')
+        return (datetime.fromisoformat(stamp) if stamp else None), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ApiError('Invalid cursor.')
+
+
+def parse_limit():
+    try:
+        limit = int(request.args.get('limit', DEFAULT_LIMIT))
+    except ValueError:
+        raise ApiError('limit must be an integer.')
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def parse_ids():
+    raw = request.args.get('ids', '')
+    try:
+        ids = sorted({int(i) for i in raw.split(',') if i.strip()})
+    except ValueError:
+        raise ApiError('ids must be a comma-separated list of integers.')
+    if not ids:
+        raise ApiError('Provide ids, e.g. ?ids=1,2,3.')
+    if len(ids) > BATCH_MAX_IDS:
+        raise ApiError(f'At most {BATCH_MAX_IDS} ids per batch request.')
+    return ids
+
+
+def sync_page(query, stamp_column, id_column):
+    """Apply If-Modified-Since, ?cursor= and ?limit= to a query ordered by (stamp, id).
+
+    Rows stamped within the last SYNC_SETTLE are held back for the next sync,
+    so changes appear up to that much later but are not skipped as long as
+    their transaction commits within it.
+
+    Returns (rows, next_cursor), or a 304 response when nothing changed.
+    """
+    limit = parse_limit()
+    query = query.where((stamp_column <= datetime.utcnow() - SYNC_SETTLE) | stamp_column.is_(None))
+    since = modified_since()
+    if since is not None:
+        query = query.where(stamp_column > since)
+    cursor = request.args.get('cursor')
+    if cursor:
+        after_stamp, after_id = decode_cursor(cursor)
+        if after_stamp is None:
+            query = query.where(id_column > after_id)
+        else:
+            query = query.where(
+                (stamp_column > after_stamp) |
+                ((stamp_column == after_stamp) & (id_column > after_id))
+            )
+    rows = db.session.execute(
+        query.order_by(stamp_column, id_column).limit(limit + 1)
+    ).all()
+
+    if since is not None and not rows and not cursor:
+        return not_modified(since)
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    last = rows[-1] if rows else None
+    next_cursor = encode_cursor(getattr(last, stamp_column.key), getattr(last, id_column.key)) if has_more else None
+    return rows, next_cursor
+
+
+def list_resource(resource, filters=()):
+    """Cursor-paginated listing ordered by (updated_at, id) for incremental sync."""
+    model, _ = RESOURCES[resource]
+    names, columns = selected_fields(resource)
+    page = sync_page(db.select(*columns).where(*filters), model.updated_at, model.id)
+    if isinstance(page, Response):
+        return page
+    rows, next_cursor = page
+
+    response = jsonify({
+        'data': [to_dict(names, row) for row in rows],
+        'next_cursor': next_cursor,
+    })
+    stamps = [row.updated_at for row in rows if row.updated_at]
+    if stamps:
+        response.last_modified = max(stamps)
+    return response
+
+
+def deleted_resource(resource):
+    """Ids deleted (or archived) since If-Modified-Since, paged like list_resource.
+
+    Tombstones are written by PostgreSQL triggers and kept for a limited time
+    (manage_api_tokens.py --prune-deleted); a client that has not synced within
+    that period should do a full resync.
+    """
+    query = db.select(DeletedRecord.deleted_at, DeletedRecord.id, DeletedRecord.record_id)\
+              .where(DeletedRecord.table_name == resource)
+    page = sync_page(query, DeletedRecord.deleted_at, DeletedRecord.id)
+    if isinstance(page, Response):
+        return page
+    rows, next_cursor = page
+
+    response = jsonify({
+        'data': [{'id': row.record_id, 'deleted_at': serialize(row.deleted_at)} for row in rows],
+        'next_cursor': next_cursor,
+    })
+    if rows:
+        response.last_modified = rows[-1].deleted_at
+    return response
+
+
+def get_resource(resource, resource_id):
+    model, _ = RESOURCES[resource]
+    names, columns = selected_fields(resource)
+    row = db.session.execute(db.select(*columns).where(model.id == resource_id)).first()
+    if row is None:
+        raise ApiError(f'{resource[:-1].capitalize()} {resource_id} not found.', 404)
+    since = modified_since()
+    if since is not None and row.updated_at and row.updated_at.replace(microsecond=0) <= since:
+        return not_modified(row.updated_at)
+    response = jsonify({'data': to_dict(names, row)})
+    if row.updated_at:
+        response.last_modified = row.updated_at
+    return response
+
+
+def batch_resource(resource):
+    """Resolve up to BATCH_MAX_IDS ids with a single IN query."""
+    model, _ = RESOURCES[resource]
+    names, columns = selected_fields(resource)
+    ids = parse_ids()
+    rows = db.session.execute(db.select(*columns).where(model.id.in_(ids)).order_by(model.id)).all()
+    found = {row.id for row in rows}
+
+    since = modified_since()
+    if since is not None:
+        changed = [row for row in rows if not row.updated_at or row.updated_at.replace(microsecond=0) > since]
+        if rows and not changed:
+            return not_modified(max(row.updated_at for row in rows))
+        rows = changed
+
+    response = jsonify({
+        'data': [to_dict(names, row) for row in rows],
+        'missing': [i for i in ids if i not in found],
+    })
+    stamps = [row.updated_at for row in rows if row.updated_at]
+    if stamps:
+        response.last_modified = max(stamps)
+    return response
+
+
+# ========== PATIENTS ==========
+
+@api_bp.route('/patients')
+@token_required
+def patients_list():
+    return list_resource('patients')
+
+@api_bp.route('/patients/batch')
+@token_required
+def patients_batch():
+    return batch_resource('patients')
+
+@api_bp.route('/patients/deleted')
+@token_required
+def patients_deleted():
+    return deleted_resource('patients')
+
+@api_bp.route('/patients/<int:id>')
+@token_required
+def patients_get(id):
+    return get_resource('patients', id)
+
+# ========== APPOINTMENTS ==========
+
+@api_bp.route('/appointments')
+@token_required
+def appointments_list():
+    filters = []
+    if request.args.get('status'):
+        filters.append(Appointment.status == request.args['status'])
+    if request.args.get('patient_id'):
+        try:
+            filters.append(Appointment.patient_id == int(request.args['patient_id']))
+        except ValueError:
+            raise ApiError('patient_id must be an integer.')
+    return list_resource('appointments', filters)
+
+@api_bp.route('/appointments/batch')
+@token_required
+def appointments_batch():
+    return batch_resource('appointments')
+
+@api_bp.route('/appointments/deleted')
+@token_required
+def appointments_deleted():
+    return deleted_resource('appointments')
+
+@api_bp.route('/appointments/<int:id>')
+@token_required
+def appointments_get(id):
+    return get_resource('appointments', id)
@@ -22,9 +22,18 @@ from app.models import User
 
 DEFAULT_PASSWORD = 'g3company!@#'
 
+_app = None
+
+def get_app():
+    """Create the app once per run (no views needed for command-line work)"""
+    global _app
+    if _app is None:
+        _app = create_app(register_views=False)
+    return _app
+
 def create_user(username, email, full_name, role, phone=None):
     """Create a new user with default password"""
-    app = create_app()
+    app = get_app()
     
     with app.app_context():
         # Check if user exists
@@ -52,7 +61,7 @@ def create_user(username, email, full_name, role, phone=None):
 
 def list_users():
     """List all existing users"""
-    app = create_app()
+    app = get_app()
     
     with app.app_context():
         users = User.query.all()
@@ -69,7 +78,7 @@ def list_users():
 
 def reset_all_passwords():
     """Reset all user passwords to default"""
-    app = create_app()
+    app = get_app()
     
     with app.app_context():
         users = User.query.all()
@@ -0,0 +1,168 @@
+import re
+from difflib import SequenceMatcher
+from sqlalchemy import inspect
+from . import db
+from .models import Patient, PatientBlockingKey
+
+# Score at or above which two records are reported as likely duplicates
+DUPLICATE_THRESHOLD = 0.80
+
+_SOUNDEX_CODES = {}
+for _letters, _digit in (('BFPV', '1'), ('CGJKQSXZ', '2'), ('DT', '3'),
+                         ('L', '4'), ('MN', '5'), ('R', '6')):
+    for _letter in _letters:
+        _SOUNDEX_CODES[_letter] = _digit
+
+
+def soundex(word):
+    """American Soundex code, e.g. 'Robert' -> 'R163'. Empty string for no letters."""
+    letters = re.sub(r'[^A-Z]', '', (word or '').upper())
+    if not letters:
+        return ''
+    code = letters[0]
+    last = _SOUNDEX_CODES.get(letters[0], '')
+    for letter in letters[1:]:
+        digit = _SOUNDEX_CODES.get(letter, '')
+        if digit and digit != last:
+            code += digit
+        if letter not in 'HW':
+            last = digit
+    return (code + '000')[:4]
+
+
+def normalize_name(name):
+    return ' '.join(re.sub(r'[^a-z ]', ' ', (name or '').lower()).split())
+
+
+def normalize_phone(phone):
+    """Last 10 digits of a phone number, or '' if it is too short to be useful."""
+    digits = re.sub(r'\D', '', phone or '')
+    return digits[-10:] if len(digits) >= 7 else ''
+
+
+def normalize_email(email):
+    return (email or '').strip().lower()
+
+
+def blocking_keys(first_name, last_name, date_of_birth=None, phone=None, email=None):
+    """Keys that put likely duplicates in the same block.
+
+    Name phonetics are sorted so swapped first/last names share a key.
+    """
+    keys = set()
+    names = sorted(filter(None, (soundex(first_name), soundex(last_name))))
+    if names and date_of_birth:
+        keys.add(f"n:{''.join(names)}:{date_of_birth.isoformat()}")
+    phone = normalize_phone(phone)
+    if phone:
+        keys.add(f'p:{phone}')
+    email = normalize_email(email)
+    if email:
+        keys.add(f'e:{email}')
+    return keys
+
+
+def patient_record(patient):
+    """Plain dict of the fields used for scoring (picklable for the batch job)."""
+    return {
+        'id': patient.id,
+        'patient_id': patient.patient_id,
+        'first_name': patient.first_name,
+        'last_name': patient.last_name,
+        'date_of_birth': patient.date_of_birth,
+        'phone': patient.phone,
+        'email': patient.email,
+    }
+
+
+def similarity(a, b):
+    """Weighted similarity between two patient records, from 0.0 to 1.0.
+
+    Only fields present on both records count towards the score.
+    """
+    score = 0.0
+    weight = 0.0
+
+    name_a = normalize_name(f"{a.get('first_name') or ''} {a.get('last_name') or ''}")
+    name_b = normalize_name(f"{b.get('first_name') or ''} {b.get('last_name') or ''}")
+    swapped_b = normalize_name(f"{b.get('last_name') or ''} {b.get('first_name') or ''}")
+    if name_a and name_b:
+        ratio = max(SequenceMatcher(None, name_a, name_b).ratio(),
+                    SequenceMatcher(None, name_a, swapped_b).ratio())
+        score += 0.5 * ratio
+        weight += 0.5
+
+    if a.get('date_of_birth') and b.get('date_of_birth'):
+        score += 0.25 * (a['date_of_birth'] == b['date_of_birth'])
+        weight += 0.25
+
+    phone_a, phone_b = normalize_phone(a.get('phone')), normalize_phone(b.get('phone'))
+    if phone_a and phone_b:
+        score += 0.15 * (phone_a == phone_b)
+        weight += 0.15
+
+    email_a, email_b = normalize_email(a.get('email')), normalize_email(b.get('email'))
+    if email_a and email_b:
+        score += 0.1 * (email_a == email_b)
+        weight += 0.1
+
+    # A name alone is not enough evidence
+    if weight <= 0.5:
+        return 0.0
+    return round(score / weight, 3)
+
+
+_index_ready = False
+
+
+def blocking_index_ready():
+    """True once the patient_blocking_keys table exists (manage_duplicates.py --reindex)."""
+    global _index_ready
+    if not _index_ready:
+        _index_ready = inspect(db.engine).has_table(PatientBlockingKey.__tablename__)
+    return _index_ready
+
+
+def find_duplicates(first_name, last_name, date_of_birth=None, phone=None, email=None,
+                    exclude_id=None, threshold=DUPLICATE_THRESHOLD):
+    """Return [(score, patient)] for indexed patients sharing a block with these details.
+
+    Uses the blocking key index, so only patients in the same block are
+    loaded and scored. Returns no matches until the index table exists.
+    """
+    keys = blocking_keys(first_name, last_name, date_of_birth, phone, email)
+    if not keys or not blocking_index_ready():
+        return []
+    candidate_ids = db.session.query(PatientBlockingKey.patient_id)\
+                              .filter(PatientBlockingKey.key.in_(keys))\
+                              .distinct()
+    query = Patient.query.filter(Patient.id.in_(candidate_ids))
+    if exclude_id is not None:
+        query = query.filter(Patient.id != exclude_id)
+
+    record = {
+        'first_name': first_name,
+        'last_name': last_name,
+        'date_of_birth': date_of_birth,
+        'phone': phone,
+        'email': email,
+    }
+    matches = []
+    for patient in query.all():
+        score = similarity(record, patient_record(patient))
+        if score >= threshold:
+            matches.append((score, patient))
+    matches.sort(key=lambda m: m[0], reverse=True)
+    return matches
+
+
+def index_patient(patient):
+    """Replace the stored blocking keys for a patient. Caller commits.
+
+    Does nothing before the index table exists; --reindex fills it in later.
+    """
+    if not blocking_index_ready():
+        return
+    keys = blocking_keys(patient.first_name, patient.last_name,
+                         patient.date_of_birth, patient.phone, patient.email)
+    patient.blocking_keys = [PatientBlockingKey(key=key) for key in sorted(keys)]
@@ -0,0 +1,313 @@
+import json
+import queue
+import select
+import threading
+import time
+import weakref
+from sqlalchemy import event, inspect
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+CHANNEL = 'clinic_events'
+
+# Brokers fed by the in-process notifier; its Session listeners are installed once
+_local_brokers = weakref.WeakSet()
+_local_installed = False
+
+# Slack for NOTIFY reaching processes at slightly different times when a client
+# resumes in a different process than its last stream (seconds)
+RESUME_MARGIN = 2.0
+
+
+def client_since(last_event_id, page_since):
+    """Time a connecting client is known to be current as of, or None if unknown.
+
+    last_event_id is sent by the browser when it reconnects; page_since is the
+    render time the page passes (?since=) on its first connection.
+    """
+    try:
+        if last_event_id:
+            return float(last_event_id) - RESUME_MARGIN
+        if page_since:
+            return float(page_since)
+    except ValueError:
+        pass
+    return None
+
+
+class Subscriber:
+    """One browser's event queue. Flags the client for a resync instead of blocking the publisher."""
+
+    def __init__(self, maxsize=100):
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.needs_resync = False
+
+    def put(self, data):
+        try:
+            self.queue.put_nowait(data)
+        except queue.Full:
+            self.needs_resync = True
+
+    def get(self, timeout):
+        return self.queue.get(timeout=timeout)
+
+
+class EventBroker:
+    """Fans database change events out to Server-Sent Events subscribers.
+
+    With PostgreSQL, one LISTEN connection per process receives NOTIFY
+    payloads from the triggers installed by manage_events.py. With any other
+    database (SQLite in tests) events are published in-process from ORM
+    session commits instead.
+
+    Every open stream occupies one mod_wsgi worker thread, so streams are
+    closed after EVENTS_MAX_STREAM_SECONDS (the browser reconnects on its
+    own) and at most EVENTS_MAX_SUBSCRIBERS streams are served per process.
+    Size the daemon process with threads= at least EVENTS_MAX_SUBSCRIBERS
+    plus the normal request concurrency, e.g. threads=25 for the defaults.
+
+    Nothing is replayed across reconnects. Instead each stream sends the time
+    up to which the client is current as its SSE id; the browser echoes it
+    back in Last-Event-ID (or the page passes ?since= on first connect), and
+    the client is told to resync if this process saw any event after that
+    time or was not listening for all of it.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.backend = None
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._listener = None
+        self._live_since = None      # time since which this process has seen every event
+        self._last_event_at = 0.0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('EVENTS_BACKEND', 'auto')   # auto, postgres or local
+        app.config.setdefault('EVENTS_KEEPALIVE', 15)     # seconds between SSE keepalive comments
+        app.config.setdefault('EVENTS_MAX_STREAM_SECONDS', 300)
+        app.config.setdefault('EVENTS_MAX_SUBSCRIBERS', 10)   # per process; each holds a worker thread
+
+        backend = app.config['EVENTS_BACKEND']
+        if backend == 'auto':
+            uri = app.config['SQLALCHEMY_DATABASE_URI']
+            backend = 'postgres' if make_url(uri).get_backend_name() == 'postgresql' else 'local'
+        self.app = app
+        self.backend = backend
+        if backend == 'local':
+            _install_local_notifier()
+            _local_brokers.add(self)
+            self._live_since = time.time()
+        app.extensions['event_broker'] = self
+
+    # ----- subscribers -----
+
+    def subscribe(self, since=None):
+        """Register a new subscriber, or return None when this process is at its limit.
+
+        since is the time the client was last known to be current (see
+        client_since()); None means unknown, and the client is told to resync.
+        """
+        subscriber = Subscriber()
+        with self._lock:
+            if len(self._subscribers) >= self.app.config['EVENTS_MAX_SUBSCRIBERS']:
+                return None
+            self._subscribers.add(subscriber)
+            subscriber.needs_resync = self.missed_since(since)
+        if self.backend == 'postgres':
+            self._ensure_listener()
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, payload):
+        data = payload if isinstance(payload, str) else json.dumps(payload, default=str)
+        with self._lock:
+            subscribers = list(self._subscribers)
+        self._last_event_at = time.time()
+        for subscriber in subscribers:
+            subscriber.put(data)
+
+    def resync_all(self):
+        """Tell every connected client to reload, e.g. after events may have been lost."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            subscriber.needs_resync = True
+
+    def missed_since(self, since):
+        """True if a client current as of `since` (epoch seconds) may have missed events."""
+        if since is None or self._live_since is None or self._live_since > since:
+            return True
+        return self._last_event_at > since
+
+    def publish_local(self, payloads):
+        """Publish changes made with Core statements, which bypass ORM session events.
+
+        PostgreSQL triggers already report those rows, so this only applies to
+        the local notifier.
+        """
+        if self.backend == 'local':
+            for payload in payloads:
+                self.publish(payload)
+
+    def stream(self, subscriber):
+        """Yield SSE frames until the client disconnects or the stream lifetime is up."""
+        keepalive = self.app.config['EVENTS_KEEPALIVE']
+        deadline = time.monotonic() + self.app.config['EVENTS_MAX_STREAM_SECONDS']
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                if subscriber.needs_resync:
+                    # Client fell behind or events were lost; reload rather than show wrong counts
+                    yield 'event: resync\ndata: {}\n\n'
+                    return
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    # Free the worker thread; EventSource reconnects after the retry delay
+                    # and resumes from the id sent here
+                    while True:
+                        try:
+                            yield f'data: {subscriber.queue.get_nowait()}\n\n'
+                        except queue.Empty:
+                            break
+                    yield f'id: {time.time():.3f}\nretry: 500\n\n'
+                    return
+                try:
+                    data = subscriber.get(timeout=min(keepalive, remaining))
+                except queue.Empty:
+                    # Keepalive that also records how far the client is current
+                    yield f'id: {time.time():.3f}\n\n'
+                    continue
+                yield f'data: {data}\n\n'
+        finally:
+            self.unsubscribe(subscriber)
+
+    def busy(self, since=None):
+        """SSE body for a refused subscription: ask the browser to try again later."""
+        if since is None:
+            # Make sure the retry carries a Last-Event-ID, so it resyncs
+            yield 'id: 0\nretry: 60000\n\n'
+        else:
+            yield 'retry: 60000\n\n'
+
+    # ----- PostgreSQL LISTEN -----
+
+    def _ensure_listener(self):
+        with self._lock:
+            if self._listener is not None and self._listener.is_alive():
+                return
+            self._listener = threading.Thread(target=self._listen, name='clinic-events-listener', daemon=True)
+            self._listener.start()
+
+    def _listen(self):
+        from . import db
+
+        delay = 1
+        listened = False
+        while True:
+            conn = None
+            try:
+                with self.app.app_context():
+                    # Take a dedicated connection out of the pool for the life of the listener
+                    conn = db.engine.raw_connection()
+                    conn.detach()
+                raw = conn.dbapi_connection
+                raw.autocommit = True
+                with raw.cursor() as cur:
+                    cur.execute(f'LISTEN {CHANNEL}')
+                self._live_since = time.time()
+                if listened:
+                    # Anything sent while the listener was down is gone
+                    self.resync_all()
+                listened = True
+                delay = 1
+                while True:
+                    if select.select([raw], [], [], 30) == ([], [], []):
+                        continue
+                    raw.poll()
+                    while raw.notifies:
+                        self.publish(raw.notifies.pop(0).payload)
+            except Exception as e:
+                self._live_since = None
+                print(f"Event listener error: {e}; reconnecting in {delay}s")
+                time.sleep(delay)
+                delay = min(delay * 2, 60)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+
+
+def appointment_event(op, appt, old_status=None, old_date=None):
+    """Payload for an appointment change, matching the NOTIFY trigger's JSON."""
+    return {
+        'table': 'appointments',
+        'op': op,
+        'id': appt.id,
+        'status': appt.status,
+        'old_status': old_status,
+        'appointment_date': appt.appointment_date.isoformat() if appt.appointment_date else None,
+        'old_date': old_date.isoformat() if old_date else None,
+        'appointment_time': appt.appointment_time,
+        'patient_name': appt.patient_name,
+        'doctor': appt.doctor,
+    }
+
+
+def _old_value(history):
+    """Value before the flush: the replaced value, or the current one if unchanged."""
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    return None
+
+
+def _install_local_notifier():
+    """Publish events from ORM commits in this process (used when there is no PostgreSQL)."""
+    global _local_installed
+    if _local_installed:
+        return
+    _local_installed = True
+    from .models import Appointment, Patient
+
+    def collect(session, flush_context):
+        pending = session.info.setdefault('clinic_events', [])
+        for obj in session.new:
+            if isinstance(obj, Appointment):
+                pending.append(appointment_event('INSERT', obj))
+            elif isinstance(obj, Patient):
+                pending.append({'table': 'patients', 'op': 'INSERT', 'id': obj.id})
+        for obj in session.dirty:
+            if isinstance(obj, Appointment) and session.is_modified(obj):
+                state = inspect(obj)
+                pending.append(appointment_event(
+                    'UPDATE', obj,
+                    old_status=_old_value(state.attrs.status.history),
+                    old_date=_old_value(state.attrs.appointment_date.history),
+                ))
+        for obj in session.deleted:
+            if isinstance(obj, Appointment):
+                pending.append(appointment_event('DELETE', obj))
+            elif isinstance(obj, Patient):
+                pending.append({'table': 'patients', 'op': 'DELETE', 'id': obj.id})
+
+    def publish(session):
+        for payload in session.info.pop('clinic_events', []):
+            for broker in list(_local_brokers):
+                broker.publish(payload)
+
+    def discard(session):
+        session.info.pop('clinic_events', None)
+
+    # after_flush sees new objects with their ids assigned
+    event.listen(Session, 'after_flush', collect)
+    event.listen(Session, 'after_commit', publish)
+    event.listen(Session, 'after_rollback', discard)
@@ -0,0 +1,52 @@
+from . import db
+from .models import User, Patient, Appointment
+
+# Only the columns each list template renders. Rows come back as lightweight
+# SQLAlchemy Row tuples (attribute access still works in templates), so large
+# Text columns and password hashes are never fetched and no ORM identity map
+# entries are created.
+PATIENT_LIST_COLUMNS = (
+    Patient.id, Patient.patient_id, Patient.first_name, Patient.last_name,
+    Patient.gender, Patient.phone,
+)
+STAFF_LIST_COLUMNS = (
+    User.id, User.full_name, User.username, User.email,
+    User.role, User.is_active, User.last_login,
+)
+APPOINTMENT_LIST_COLUMNS = (
+    Appointment.id, Appointment.patient_name, Appointment.doctor, Appointment.appointment_date,
+    Appointment.appointment_time, Appointment.department, Appointment.status,
+)
+
+
+def patient_rows(search=''):
+    query = db.select(*PATIENT_LIST_COLUMNS)
+    if search:
+        query = query.where(
+            (Patient.first_name.ilike(f'%{search}%')) |
+            (Patient.last_name.ilike(f'%{search}%')) |
+            (Patient.patient_id.ilike(f'%{search}%'))
+        )
+    return db.session.execute(query.order_by(Patient.created_at.desc())).all()
+
+
+def staff_rows(search=''):
+    query = db.select(*STAFF_LIST_COLUMNS)
+    if search:
+        query = query.where(
+            (User.full_name.ilike(f'%{search}%')) |
+            (User.username.ilike(f'%{search}%')) |
+            (User.email.ilike(f'%{search}%'))
+        )
+    return db.session.execute(query.order_by(User.created_at.desc())).all()
+
+
+def appointment_rows(status=None, appointment_date=None):
+    query = db.select(*APPOINTMENT_LIST_COLUMNS)
+    if status:
+        query = query.where(Appointment.status == status)
+    if appointment_date:
+        query = query.where(Appointment.appointment_date == appointment_date)
+    return db.session.execute(
+        query.order_by(Appointment.appointment_date.desc(), Appointment.appointment_time.desc())
+    ).all()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+HealthClinic API Token Manager
+Issues and revokes bearer tokens for the JSON API (/api/v1).
+
+Usage:
+  python3 manage_api_tokens.py --setup                 # Create API tables, sync indexes and deletion triggers
+  python3 manage_api_tokens.py --create NAME           # Create a token for an integration (shown once)
+  python3 manage_api_tokens.py --list                  # List tokens
+  python3 manage_api_tokens.py --revoke ID             # Revoke a token
+  python3 manage_api_tokens.py --prune-deleted [DAYS]  # Drop deletion records older than DAYS (default 90)
+
+Clients send the token as:  Authorization: Bearer <token>
+
+--setup (PostgreSQL) builds the (updated_at, id) indexes used by incremental
+sync and installs AFTER DELETE triggers on patients and appointments that
+record deleted ids in deleted_records, served at /api/v1/<resource>/deleted.
+Rows removed by manage_partitions.py --archive are reported there as well.
+The trigger and index are kept if manage_partitions.py --setup converts
+appointments afterwards.
+"""
+
+import sys
+import os
+
+# Add parent directory to path so we can import app
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from datetime import datetime, timedelta
+from sqlalchemy import text
+from app import create_app, db
+from app.models import ApiToken, DeletedRecord
+from app.api import generate_token, hash_token
+from app.pg_indexes import create_index_concurrently
+
+SYNC_TABLES = ('patients', 'appointments')
+
+TOMBSTONE_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION clinic_record_deletion() RETURNS trigger AS $$
+BEGIN
+    -- manage_partitions.py moves rows between partitions; those are not deletions
+    IF current_setting('clinic.moving_rows', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+    INSERT INTO deleted_records (table_name, record_id, deleted_at)
+    VALUES (TG_ARGV[0], OLD.id, now() AT TIME ZONE 'utc');
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+
+def install_tombstone_trigger(conn, table):
+    """(Re)create the AFTER DELETE trigger that records deleted ids for table."""
+    conn.execute(text(f"DROP TRIGGER IF EXISTS {table}_tombstone_trg ON {table}"))
+    # The table name is passed explicitly: on a partition TG_TABLE_NAME is the partition
+    conn.execute(text(f"""
+        CREATE TRIGGER {table}_tombstone_trg AFTER DELETE ON {table}
+        FOR EACH ROW EXECUTE FUNCTION clinic_record_deletion('{table}')
+    """))
+
+
+def setup():
+    """Create the API tables, sync indexes and deletion triggers"""
+    app = create_app(register_views=False)
+
+    with app.app_context():
+        ApiToken.__table__.create(db.engine, checkfirst=True)
+        DeletedRecord.__table__.create(db.engine, checkfirst=True)
+        with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+            conn.execute(text(TOMBSTONE_FUNCTION_SQL))
+            for table in SYNC_TABLES:
+                print(f"🔧 Setting up sync on '{table}'...")
+                create_index_concurrently(conn, table, 'updated_at_id', '(updated_at, id)')
+                install_tombstone_trigger(conn, table)
+                print(f"✅ '{table}' ready")
+        print("\n✅ API setup complete.\n")
+
+
+def create_token(name):
+    """Create a new token and print it once"""
+    app = create_app(register_views=False)
+
+    with app.app_context():
+        ApiToken.__table__.create(db.engine, checkfirst=True)
+        token = generate_token()
+        api_token = ApiToken(name=name, token_hash=hash_token(token), is_active=True)
+        db.session.add(api_token)
+        db.session.commit()
+
+        print(f"\n✅ Created token #{api_token.id} for '{name}'")
+        print(f"\n   {token}\n")
+        print("⚠️  Store it now - it cannot be shown again.\n")
+
+
+def list_tokens():
+    """List all tokens"""
+    app = create_app(register_views=False)
+
+    with app.app_context():
+        tokens = ApiToken.query.order_by(ApiToken.id).all()
+        print("\n" + "="*80)
+        print("API TOKENS")
+        print("="*80)
+        print(f"{'ID':<6} {'Name':<30} {'Status':<10} {'Last Used'}")
+        print("-"*80)
+        for api_token in tokens:
+            status = "Active" if api_token.is_active else "Revoked"
+            last_used = api_token.last_used_at.strftime('%Y-%m-%d %H:%M') if api_token.last_used_at else 'Never'
+            print(f"{api_token.id:<6} {api_token.name:<30} {status:<10} {last_used}")
+        print("-"*80)
+        print(f"Total Tokens: {len(tokens)}\n")
+
+
+def revoke_token(token_id):
+    """Revoke a token by id"""
+    app = create_app(register_views=False)
+
+    with app.app_context():
+        api_token = ApiToken.query.get(token_id)
+        if not api_token:
+            print(f"❌ Token #{token_id} not found.")
+            return
+        api_token.is_active = False
+        db.session.commit()
+        print(f"✅ Revoked token #{token_id} ({api_token.name})")
+
+
+def prune_deleted(days=90):
+    """Delete tombstones older than N days"""
+    app = create_app(register_views=False)
+
+    with app.app_context():
+        cutoff = datetime.utcnow() - timedelta(days=days)
+        removed = DeletedRecord.query.filter(DeletedRecord.deleted_at < cutoff).delete()
+        db.session.commit()
+        print(f"🗑️  Removed {removed} deletion record(s) older than {days} days")
+        print("   Clients that last synced before then need a full resync.\n")
+
+
+def main():
+    """Main function"""
+    if len(sys.argv) < 2 or sys.argv[1] == '--help':
+        print(__doc__)
+        return
+
+    command = sys.argv[1]
+    if command == '--setup':
+        setup()
+    elif command == '--create' and len(sys.argv) > 2:
+        create_token(' '.join(sys.argv[2:]))
+    elif command == '--list':
+        list_tokens()
+    elif command == '--revoke' and len(sys.argv) > 2:
+        revoke_token(int(sys.argv[2]))
+    elif command == '--prune-deleted':
+        prune_deleted(int(sys.argv[2]) if len(sys.argv) > 2 else 90)
+    else:
+        print(__doc__)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+HealthClinic Duplicate Patient Finder
+Maintains the blocking key index used for duplicate detection and scans the
+whole patients table for likely duplicates.
+
+Usage:
+  python3 manage_duplicates.py --reindex [SIZE]     # Rebuild blocking keys in batches of SIZE (default 1000)
+  python3 manage_duplicates.py --scan [WORKERS]     # Report likely duplicate pairs using WORKERS processes
+
+Run --reindex once after upgrading: it creates the patient_blocking_keys
+table if needed and indexes existing patients. Until then duplicate warnings
+and appointment match suggestions are simply not shown.
+
+Only patients that share a blocking key (same name phonetics + date of birth,
+same phone or same email) are compared, so the scan never does an all-pairs
+comparison of the table.
+"""
+
+import sys
+import os
+from itertools import combinations
+from multiprocessing import Pool
+
+# Add parent directory to path so we can import app
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from app import create_app, db
+from app.models import Patient, PatientBlockingKey
+from app.dedup import index_patient, patient_record, similarity, DUPLICATE_THRESHOLD
+
+BLOCKS_PER_CHUNK = 500
+
+
+def reindex(batch_size=1000):
+    """Recompute blocking keys for every patient, one batch per transaction"""
+    app = create_app(register_views=False)
+
+    with app.app_context():
+        PatientBlockingKey.__table__.create(db.engine, checkfirst=True)
+        print(f"\n🔧 Rebuilding blocking keys in batches of {batch_size}...")
+        last_id = 0
+        total = 0
+        while True:
+            patients = Patient.query.filter(Patient.id > last_id)\
+                                    .order_by(Patient.id)\
+                                    .limit(batch_size).all()
+            if not patients:
+                break
+            for patient in patients:
+                index_patient(patient)
+            db.session.commit()
+            last_id = patients[-1].id
+            total += len(patients)
+            db.session.expunge_all()
+            print(f"   ... {total} patients indexed")
+        print(f"✅ Indexed {total} patients\n")
+
+
+def score_blocks(blocks):
+    """Score every pair inside each block. Runs in a worker process."""
+    results = []
+    for records in blocks:
+        for a, b in combinations(records, 2):
+            score = similarity(a, b)
+            if score >= DUPLICATE_THRESHOLD:
+                results.append((score, a, b))
+    return results
+
+
+def load_blocks():
+    """Return a list of blocks (lists of patient records) with more than one patient."""
+    shared_keys = db.session.query(PatientBlockingKey.key)\
+                            .group_by(PatientBlockingKey.key)\
+                            .having(db.func.count(PatientBlockingKey.patient_id) > 1)\
+                            .subquery()
+    rows = db.session.query(PatientBlockingKey.key, PatientBlockingKey.patient_id)\
+                     .filter(PatientBlockingKey.key.in_(db.select(shared_keys.c.key)))\
+                     .order_by(PatientBlockingKey.key).all()
+
+    members = {}
+    for key, patient_id in rows:
+        members.setdefault(key, []).append(patient_id)
+
+    ids = {patient_id for _, patient_id in rows}
+    records = {}
+    id_list = sorted(ids)
+    for start in range(0, len(id_list), 1000):
+        chunk = id_list[start:start + 1000]
+        for patient in Patient.query.filter(Patient.id.in_(chunk)).all():
+            records[patient.id] = patient_record(patient)
+
+    return [[records[pid] for pid in pids if pid in records] for pids in members.values()]
+
+
+def scan(workers=4):
+    """Find likely duplicate pairs within blocks, scoring chunks of blocks in parallel"""
+    app = create_app(register_views=False)
+
+    with app.app_context():
+        blocks = load_blocks()
+
+    chunks = [blocks[i:i + BLOCKS_PER_CHUNK] for i in range(0, len(blocks), BLOCKS_PER_CHUNK)]
+    print(f"\n🔎 Scoring {len(blocks)} block(s) in {len(chunks)} chunk(s) with {workers} worker(s)...")
+
+    if workers > 1 and len(chunks) > 1:
+        with Pool(workers) as pool:
+            chunk_results = pool.map(score_blocks, chunks)
+    else:
+        chunk_results = [score_blocks(chunk) for chunk in chunks]
+
+    # The same pair can share several keys; keep its best score once
+    pairs = {}
+    for results in chunk_results:
+        for score, a, b in results:
+            pair = tuple(sorted((a['id'], b['id'])))
+            if pair not in pairs or score > pairs[pair][0]:
+                pairs[pair] = (score, a, b)
+
+    print("\n" + "="*80)
+    print("LIKELY DUPLICATE PATIENTS")
+    print("="*80)
+    print(f"{'Score':<8} {'Patient A':<34} {'Patient B':<34}")
+    print("-"*80)
+    for score, a, b in sorted(pairs.values(), key=lambda p: p[0], reverse=True):
+        name_a = f"{a['patient_id']} {a['first_name']} {a['last_name']}"
+        name_b = f"{b['patient_id']} {b['first_name']} {b['last_name']}"
+        print(f"{score:<8.2f} {name_a[:33]:<34} {name_b[:33]:<34}")
+    print("-"*80)
+    print(f"Total Pairs: {len(pairs)}\n")
+
+
+def main():
+    """Main function"""
+    if len(sys.argv) < 2 or sys.argv[1] == '--help':
+        print(__doc__)
+        return
+
+    command = sys.argv[1]
+    if command == '--reindex':
+        reindex(int(sys.argv[2]) if len(sys.argv) > 2 else 1000)
+    elif command == '--scan':
+        scan(int(sys.argv[2]) if len(sys.argv) > 2 else 4)
+    else:
+        print(__doc__)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+HealthClinic Live Event Manager
+Installs the PostgreSQL NOTIFY triggers that feed the live dashboard and
+appointment queue (/events), and can tail the channel for debugging.
+
+Usage:
+  python3 manage_events.py --setup     # Create/replace the NOTIFY triggers on appointments and patients
+  python3 manage_events.py --remove    # Drop the triggers
+  python3 manage_events.py --tail      # Print events as they arrive (Ctrl+C to stop)
+
+The triggers are kept when manage_partitions.py --setup converts appointments
+to a partitioned table, so --setup can run before or after it.
+"""
+
+import sys
+import os
+import select
+
+# Add parent directory to path so we can import app
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from sqlalchemy import text
+from app import create_app, db
+from app.events import CHANNEL
+
+# The JSON built here must match app.events.appointment_event()
+NOTIFY_FUNCTION_SQL = f"""
+CREATE OR REPLACE FUNCTION clinic_notify_change() RETURNS trigger AS $$
+DECLARE
+    rec RECORD;
+    payload json;
+    -- On a partition TG_TABLE_NAME is the partition, so the trigger passes the table name
+    tbl text := COALESCE(TG_ARGV[0], TG_TABLE_NAME);
+BEGIN
+    -- manage_partitions.py moves rows between partitions; those are not changes
+    IF current_setting('clinic.moving_rows', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP = 'DELETE' THEN
+        rec := OLD;
+    ELSE
+        rec := NEW;
+    END IF;
+
+    IF tbl = 'appointments' THEN
+        payload := json_build_object(
+            'table', 'appointments',
+            'op', TG_OP,
+            'id', rec.id,
+            'status', rec.status,
+            'old_status', CASE WHEN TG_OP = 'UPDATE' THEN OLD.status END,
+            'appointment_date', rec.appointment_date,
+            'old_date', CASE WHEN TG_OP = 'UPDATE' THEN OLD.appointment_date END,
+            'appointment_time', rec.appointment_time,
+            'patient_name', rec.patient_name,
+            'doctor', rec.doctor
+        );
+    ELSE
+        payload := json_build_object('table', tbl, 'op', TG_OP, 'id', rec.id);
+    END IF;
+
+    PERFORM pg_notify('{CHANNEL}', payload::text);
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+TRIGGERS = {
+    # Only changes that move dashboard counts or the pending queue are sent
+    'appointments': "AFTER INSERT OR DELETE OR UPDATE OF status, appointment_date, appointment_time, doctor",
+    'patients': "AFTER INSERT OR DELETE",
+}
+
+
+def setup():
+    """Install the NOTIFY function and triggers"""
+    app = create_app(register_views=False)
+
+    with app.app_context():
+        db.session.execute(text(NOTIFY_FUNCTION_SQL))
+        for table, timing in TRIGGERS.items():
+            db.session.execute(text(f"DROP TRIGGER IF EXISTS {table}_notify_trg ON {table}"))
+            db.session.execute(text(f"""
+                CREATE TRIGGER {table}_notify_trg {timing} ON {table}
+                FOR EACH ROW EXECUTE FUNCTION clinic_notify_change('{table}')
+            """))
+            print(f"✅ Notify trigger installed on '{table}'")
+        db.session.commit()
+        print()
+
+
+def remove():
+    """Drop the NOTIFY triggers"""
+    app = create_app(register_views=False)
+
+    with app.app_context():
+        for table in TRIGGERS:
+            db.session.execute(text(f"DROP TRIGGER IF EXISTS {table}_notify_trg ON {table}"))
+            print(f"🗑️  Notify trigger removed from '{table}'")
+        db.session.commit()
+        print()
+
+
+def tail():
+    """Print NOTIFY payloads as they arrive"""
+    app = create_app(register_views=False)
+
+    with app.app_context():
+        conn = db.engine.raw_connection()
+        raw = conn.dbapi_connection
+        raw.autocommit = True
+        with raw.cursor() as cur:
+            cur.execute(f'LISTEN {CHANNEL}')
+        print(f"\n👂 Listening on '{CHANNEL}' (Ctrl+C to stop)...\n")
+        try:
+            while True:
+                if select.select([raw], [], [], 30) == ([], [], []):
+                    continue
+                raw.poll()
+                while raw.notifies:
+                    print(raw.notifies.pop(0).payload)
+        except KeyboardInterrupt:
+            print()
+        finally:
+            conn.close()
+
+
+def main():
+    """Main function"""
+    if len(sys.argv) < 2 or sys.argv[1] == '--help':
+        print(__doc__)
+        return
+
+    command = sys.argv[1]
+    if command == '--setup':
+        setup()
+    elif command == '--remove':
+        remove()
+    elif command == '--tail':
+        tail()
+    else:
+        print(__doc__)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+HealthClinic Appointment Partition Manager
+Keeps the appointments table range-partitioned by month on appointment_date
+(PostgreSQL declarative partitioning) and archives old visits.
+
+Usage:
+  python3 manage_partitions.py --setup                 # Convert appointments to a partitioned table (one time)
+  python3 manage_partitions.py --create-future [N]     # Pre-create partitions for the next N months (default 12)
+  python3 manage_partitions.py --archive [YEARS]       # Move completed/cancelled visits older than YEARS (default 3)
+                                                       # into appointments_archive and drop emptied partitions
+  python3 manage_partitions.py --list                  # List partitions and row counts
+
+Run --create-future from cron (e.g. monthly) so new bookings never land in
+the default partition. The Appointment model and all queries keep using the
+"appointments" table name unchanged.
+
+--setup carries the existing triggers and secondary indexes of appointments
+over to the partitioned table (search trigger and GIN index from
+manage_search.py, NOTIFY trigger from manage_events.py, deletion trigger and
+sync index from manage_api_tokens.py), so those setups may run before or
+after it. Unique indexes other than the primary key cannot be carried over
+(they would need appointment_date) and are reported instead. Recommended
+order on a new install: this --setup, then manage_search.py --setup and
+--backfill, manage_events.py --setup, manage_api_tokens.py --setup.
+"""
+
+import sys
+import os
+from datetime import date
+
+# Add parent directory to path so we can import app
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from sqlalchemy import text, bindparam
+from app import create_app, db
+
+PARENT_TABLE = 'appointments'
+DEFAULT_PARTITION = 'appointments_default'
+ARCHIVE_TABLE = 'appointments_archive'
+ARCHIVE_STATUSES = ('completed', 'cancelled')
+
+
+def month_start(d):
+    return date(d.year, d.month, 1)
+
+
+def add_months(d, months):
+    index = d.year * 12 + (d.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(start):
+    return f'{PARENT_TABLE}_y{start.year}m{start.month:02d}'
+
+
+def is_partitioned():
+    row = db.session.execute(text("""
+        SELECT 1 FROM pg_partitioned_table pt
+        JOIN pg_class c ON c.oid = pt.partrelid
+        WHERE c.relname = :name
+    """), {'name': PARENT_TABLE}).first()
+    return row is not None
+
+
+def existing_partitions():
+    """Return {partition_name: bound_expression} for every partition of the table."""
+    rows = db.session.execute(text("""
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+        WHERE p.relname = :name
+        ORDER BY c.relname
+    """), {'name': PARENT_TABLE}).fetchall()
+    return {r[0]: r[1] for r in rows}
+
+
+def create_month_partition(start):
+    """Create the partition for the month beginning at start, if missing.
+
+    Any rows for that month already sitting in the default partition are moved
+    into the new partition before it is attached, so ATTACH never fails.
+    """
+    name = partition_name(start)
+    if name in existing_partitions():
+        return False
+    end = add_months(start, 1)
+    params = {'start': start, 'end': end}
+    db.session.execute(text(
+        f"CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+    ))
+    # Tell the deletion trigger (manage_api_tokens.py) this is a move, not a delete
+    db.session.execute(text("SET LOCAL clinic.moving_rows = 'on'"))
+    db.session.execute(text(f"""
+        WITH moved AS (
+            DELETE FROM {DEFAULT_PARTITION}
+            WHERE appointment_date >= :start AND appointment_date < :end
+            RETURNING *
+        )
+        INSERT INTO {name} SELECT * FROM moved
+    """), params)
+    db.session.execute(text("SET LOCAL clinic.moving_rows = 'off'"))
+    db.session.execute(text(
+        f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    ))
+    return True
+
+
+def legacy_definitions():
+    """Return (triggers, indexes, skipped) as CREATE statements for the current table.
+
+    Primary key and unique indexes are left out: the partitioned table gets
+    its own primary key, and other unique indexes are returned in skipped.
+    """
+    triggers = db.session.execute(text("""
+        SELECT pg_get_triggerdef(t.oid) FROM pg_trigger t
+        WHERE t.tgrelid = CAST(:name AS regclass) AND NOT t.tgisinternal
+        ORDER BY t.tgname
+    """), {'name': PARENT_TABLE}).scalars().all()
+    rows = db.session.execute(text("""
+        SELECT c.relname, x.indisprimary, x.indisunique, pg_get_indexdef(x.indexrelid)
+        FROM pg_index x
+        JOIN pg_class c ON c.oid = x.indexrelid
+        WHERE x.indrelid = CAST(:name AS regclass)
+        ORDER BY c.relname
+    """), {'name': PARENT_TABLE}).fetchall()
+    indexes = [r[3] for r in rows if not r[1] and not r[2]]
+    skipped = [r[0] for r in rows if r[2] and not r[1]]
+    return triggers, indexes, skipped
+
+
+def setup():
+    """Convert the plain appointments table into a partitioned table"""
+    app = create_app(register_views=False)
+
+    with app.app_context():
+        if is_partitioned():
+            print(f"⚠️  '{PARENT_TABLE}' is already partitioned. Skipping...")
+            return
+
+        print(f"\n🔧 Converting '{PARENT_TABLE}' to a partitioned table...\n")
+        try:
+            bounds = db.session.execute(text(
+                f"SELECT MIN(appointment_date), MAX(appointment_date) FROM {PARENT_TABLE}"
+            )).first()
+            triggers, indexes, skipped = legacy_definitions()
+
+            db.session.execute(text(f"ALTER TABLE {PARENT_TABLE} RENAME TO {PARENT_TABLE}_legacy"))
+            db.session.execute(text(f"""
+                CREATE TABLE {PARENT_TABLE} (
+                    LIKE {PARENT_TABLE}_legacy INCLUDING DEFAULTS INCLUDING CONSTRAINTS
+                ) PARTITION BY RANGE (appointment_date)
+            """))
+            # The partition key must be part of the primary key
+            db.session.execute(text(
+                f"ALTER TABLE {PARENT_TABLE} ADD PRIMARY KEY (id, appointment_date)"
+            ))
+            db.session.execute(text(
+                f"ALTER TABLE {PARENT_TABLE} ADD FOREIGN KEY (patient_id) REFERENCES patients (id)"
+            ))
+            db.session.execute(text(
+                f"ALTER SEQUENCE {PARENT_TABLE}_id_seq OWNED BY {PARENT_TABLE}.id"
+            ))
+            db.session.execute(text(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {PARENT_TABLE} DEFAULT"))
+
+            today = month_start(date.today())
+            first = month_start(bounds[0]) if bounds[0] else today
+            last = max(month_start(bounds[1]), today) if bounds[1] else today
+            current = first
+            while current <= add_months(last, 12):
+                create_month_partition(current)
+                current = add_months(current, 1)
+
+            db.session.execute(text(
+                f"INSERT INTO {PARENT_TABLE} SELECT * FROM {PARENT_TABLE}_legacy"
+            ))
+            db.session.execute(text(f"DROP TABLE {PARENT_TABLE}_legacy"))
+
+            # Index names are schema-wide, so the old indexes are rebuilt only now that
+            # the legacy table is gone; triggers come after the copy so it fires none.
+            # Both are created on the parent and cloned onto every partition.
+            for statement in indexes:
+                db.session.execute(text(statement))
+            # Indexes for the list, dashboard and reports queries
+            db.session.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{PARENT_TABLE}_status ON {PARENT_TABLE} (status)"))
+            db.session.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{PARENT_TABLE}_created_at ON {PARENT_TABLE} (created_at)"))
+            for statement in triggers:
+                db.session.execute(text(statement))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Conversion failed, nothing was changed: {e}")
+            return
+
+        print(f"✅ '{PARENT_TABLE}' is now partitioned by month on appointment_date")
+        print(f"   Carried over {len(triggers)} trigger(s) and {len(indexes)} index(es)")
+        for name in skipped:
+            print(f"⚠️  Unique index '{name}' was not recreated (must include appointment_date)")
+        print()
+        list_partitions()
+
+
+def create_future(months=12):
+    """Pre-create monthly partitions from this month up to N months ahead"""
+    app = create_app(register_views=False)
+
+    with app.app_context():
+        if not is_partitioned():
+            print(f"❌ '{PARENT_TABLE}' is not partitioned yet. Run --setup first.")
+            return
+
+        created = 0
+        start = month_start(date.today())
+        for offset in range(months + 1):
+            month = add_months(start, offset)
+            if create_month_partition(month):
+                print(f"✅ Created: {partition_name(month)}")
+                created += 1
+        db.session.commit()
+        print(f"\n✅ Created {created} new partition(s)\n")
+
+
+def archive(years=3):
+    """Move completed/cancelled appointments older than N years into the archive table"""
+    app = create_app(register_views=False)
+
+    with app.app_context():
+        today = date.today()
+        try:
+            cutoff = today.replace(year=today.year - years)
+        except ValueError:  # 29 February
+            cutoff = today.replace(year=today.year - years, day=28)
+
+        db.session.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {ARCHIVE_TABLE} (
+                LIKE {PARENT_TABLE} INCLUDING DEFAULTS
+            )
+        """))
+        moved = db.session.execute(text(f"""
+            WITH moved AS (
+                DELETE FROM {PARENT_TABLE}
+                WHERE appointment_date < :cutoff AND status IN :statuses
+                RETURNING *
+            )
+            INSERT INTO {ARCHIVE_TABLE} SELECT * FROM moved
+        """).bindparams(bindparam('statuses', expanding=True)),
+            {'cutoff': cutoff, 'statuses': list(ARCHIVE_STATUSES)}).rowcount
+
+        dropped = []
+        if is_partitioned():
+            # Drop monthly partitions that lie entirely before the cutoff and are now empty
+            for name in existing_partitions():
+                if name == DEFAULT_PARTITION:
+                    continue
+                year, month = int(name[-7:-3]), int(name[-2:])
+                if add_months(date(year, month, 1), 1) > cutoff:
+                    continue
+                if db.session.execute(text(f"SELECT 1 FROM {name} LIMIT 1")).first():
+                    continue
+                db.session.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+                db.session.execute(text(f"DROP TABLE {name}"))
+                dropped.append(name)
+
+        db.session.commit()
+        print(f"\n📦 Archived {moved} appointment(s) older than {cutoff} into '{ARCHIVE_TABLE}'")
+        for name in dropped:
+            print(f"🗑️  Dropped empty partition: {name}")
+        print()
+
+
+def list_partitions():
+    """List partitions and their row counts"""
+    app = create_app(register_views=False)
+
+    with app.app_context():
+        partitions = existing_partitions()
+        print("\n" + "="*80)
+        print(f"PARTITIONS OF '{PARENT_TABLE}'")
+        print("="*80)
+        print(f"{'Partition':<32} {'Rows':>10}   {'Bounds'}")
+        print("-"*80)
+        for name, bound in partitions.items():
+            rows = db.session.execute(text(f"SELECT COUNT(*) FROM {name}")).scalar()
+            print(f"{name:<32} {rows:>10}   {bound}")
+        print("-"*80)
+        print(f"Total Partitions: {len(partitions)}\n")
+
+
+def main():
+    """Main function"""
+    if len(sys.argv) < 2 or sys.argv[1] == '--help':
+        print(__doc__)
+        return
+
+    command = sys.argv[1]
+    arg = int(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    if command == '--setup':
+        setup()
+    elif command == '--create-future':
+        create_future(arg if arg is not None else 12)
+    elif command == '--archive':
+        archive(arg if arg is not None else 3)
+    elif command == '--list':
+        list_partitions()
+    else:
+        print(__doc__)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+HealthClinic Full-Text Search Manager
+Sets up tsvector search columns on patients and appointments and fills them
+for existing rows.
+
+Usage:
+  python3 manage_search.py --setup            # Add search columns, triggers and GIN indexes
+  python3 manage_search.py --backfill [SIZE]  # Index existing rows in batches of SIZE (default 1000)
+  python3 manage_search.py --status           # Show how many rows are still unindexed
+
+Run after manage_partitions.py --setup when possible so the GIN index is
+built per partition without blocking writes; if appointments is converted
+later, the trigger and index are carried over to the partitioned table.
+
+The search_vector columns are plain tsvector columns kept current by BEFORE
+INSERT/UPDATE triggers. A GENERATED ... STORED column would rewrite the
+whole table under an exclusive lock when added; this way adding the column is
+instant, GIN indexes are built CONCURRENTLY and the backfill only takes row
+locks one batch at a time.
+"""
+
+import sys
+import os
+import time
+
+# Add parent directory to path so we can import app
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from sqlalchemy import text, bindparam
+from app import create_app, db
+from app.search import PATIENT_VECTOR_SQL, APPOINTMENT_VECTOR_SQL
+from app.pg_indexes import create_index_concurrently
+
+TABLES = {
+    'patients': {
+        'vector': PATIENT_VECTOR_SQL,
+        'columns': ('allergies', 'medical_notes'),
+    },
+    'appointments': {
+        'vector': APPOINTMENT_VECTOR_SQL,
+        'columns': ('reason', 'notes'),
+    },
+}
+
+
+def create_gin_index(conn, table):
+    """Build the search_vector GIN index without blocking writes."""
+    create_index_concurrently(conn, table, 'search_vector', 'USING GIN (search_vector)')
+
+
+def setup():
+    """Add search_vector columns, triggers and GIN indexes"""
+    app = create_app(register_views=False)
+
+    with app.app_context():
+        with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+            for table, spec in TABLES.items():
+                print(f"🔧 Setting up search on '{table}'...")
+                conn.execute(text(
+                    f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector"
+                ))
+                conn.execute(text(f"""
+                    CREATE OR REPLACE FUNCTION {table}_search_vector_update() RETURNS trigger AS $$
+                    BEGIN
+                        NEW.search_vector := {spec['vector'].format(row='NEW.')};
+                        RETURN NEW;
+                    END
+                    $$ LANGUAGE plpgsql
+                """))
+                conn.execute(text(f"DROP TRIGGER IF EXISTS {table}_search_vector_trg ON {table}"))
+                conn.execute(text(f"""
+                    CREATE TRIGGER {table}_search_vector_trg
+                    BEFORE INSERT OR UPDATE OF {', '.join(spec['columns'])} ON {table}
+                    FOR EACH ROW EXECUTE FUNCTION {table}_search_vector_update()
+                """))
+                create_gin_index(conn, table)
+                print(f"✅ '{table}' ready")
+
+            # Keep the archive table (manage_partitions.py) column-compatible with appointments
+            conn.execute(text(
+                "ALTER TABLE IF EXISTS appointments_archive ADD COLUMN IF NOT EXISTS search_vector tsvector"
+            ))
+
+        print("\n✅ Search setup complete. Run --backfill to index existing rows.\n")
+
+
+def index_rows(table, spec, ids):
+    """Fill search_vector for the given ids; return the ids actually updated.
+
+    SKIP LOCKED keeps the backfill from waiting on rows being edited; those
+    rows are simply left out of the result.
+    """
+    updated = db.session.execute(text(f"""
+        UPDATE {table} SET search_vector = {spec['vector'].format(row='')}
+        WHERE id IN (
+            SELECT id FROM {table}
+            WHERE id IN :ids AND search_vector IS NULL
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING id
+    """).bindparams(bindparam('ids', expanding=True)), {'ids': ids}).scalars().all()
+    db.session.commit()
+    return set(updated)
+
+
+def backfill(batch_size=1000, retries=3):
+    """Fill search_vector for existing rows, one short transaction per batch"""
+    app = create_app(register_views=False)
+
+    with app.app_context():
+        for table, spec in TABLES.items():
+            total = 0
+            skipped = set()
+            last_id = 0
+            print(f"\n🔎 Backfilling '{table}' in batches of {batch_size}...")
+            while True:
+                # Keyset paging: each batch starts after the last id seen, never from the top
+                ids = db.session.execute(text(f"""
+                    SELECT id FROM {table}
+                    WHERE id > :last_id AND search_vector IS NULL
+                    ORDER BY id
+                    LIMIT :batch
+                """), {'last_id': last_id, 'batch': batch_size}).scalars().all()
+                if not ids:
+                    break
+                last_id = ids[-1]
+                updated = index_rows(table, spec, ids)
+                # Rows locked by an edit were skipped; the edit's own trigger may index them
+                skipped.update(set(ids) - updated)
+                total += len(updated)
+                print(f"   ... {total} rows indexed")
+                time.sleep(0.05)  # let other transactions through between batches
+
+            for attempt in range(retries):
+                if not skipped:
+                    break
+                time.sleep(1)
+                pending = sorted(skipped)
+                for start in range(0, len(pending), batch_size):
+                    updated = index_rows(table, spec, pending[start:start + batch_size])
+                    total += len(updated)
+                    skipped -= updated
+                # Rows indexed meanwhile by their own UPDATE no longer need a retry
+                if skipped:
+                    still_null = db.session.execute(text(
+                        f"SELECT id FROM {table} WHERE id IN :ids AND search_vector IS NULL"
+                    ).bindparams(bindparam('ids', expanding=True)), {'ids': sorted(skipped)}).scalars().all()
+                    db.session.commit()
+                    skipped = set(still_null)
+
+            print(f"✅ '{table}': {total} rows indexed")
+            if skipped:
+                print(f"⚠️  {len(skipped)} row(s) stayed locked and were not indexed; "
+                      f"run --backfill again (first ids: {', '.join(map(str, sorted(skipped)[:10]))})")
+        print()
+
+
+def status():
+    """Show how many rows are still waiting to be indexed"""
+    app = create_app(register_views=False)
+
+    with app.app_context():
+        print("\n" + "="*80)
+        print("FULL-TEXT SEARCH STATUS")
+        print("="*80)
+        for table in TABLES:
+            row = db.session.execute(text(
+                f"SELECT COUNT(*), COUNT(*) FILTER (WHERE search_vector IS NULL) FROM {table}"
+            )).first()
+            print(f"{table:<20} {row[0]:>10} rows   {row[1]:>10} unindexed")
+        print("-"*80 + "\n")
+
+
+def main():
+    """Main function"""
+    if len(sys.argv) < 2 or sys.argv[1] == '--help':
+        print(__doc__)
+        return
+
+    command = sys.argv[1]
+    if command == '--setup':
+        setup()
+    elif command == '--backfill':
+        backfill(int(sys.argv[2]) if len(sys.argv) > 2 else 1000)
+    elif command == '--status':
+        status()
+    else:
+        print(__doc__)
+
+
+if __name__ == '__main__':
+    main()
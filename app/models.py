@@ -46,13 +46,34 @@ class Patient(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # API incremental sync pages on (updated_at, id)
+    __table_args__ = (db.Index('ix_patients_updated_at_id', 'updated_at', 'id'),)
+    
     # Relationship
     appointments = db.relationship('Appointment', backref='patient', lazy=True)
+    # passive_deletes: the database cascade removes keys, so deleting a patient never
+    # loads them (and works before manage_duplicates.py --reindex creates the table)
+    blocking_keys = db.relationship('PatientBlockingKey', backref='patient', lazy=True,
+                                    cascade='all, delete-orphan', passive_deletes=True)
     
     def __repr__(self):
         return f'<Patient {self.first_name} {self.last_name}>'
 
+class PatientBlockingKey(db.Model):
+    # Duplicate-detection index: patients sharing a key are compared (see dedup.py)
+    __tablename__ = 'patient_blocking_keys'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    patient_id = db.Column(db.Integer, db.ForeignKey('patients.id', ondelete='CASCADE'),
+                           nullable=False, index=True)
+    key = db.Column(db.String(150), nullable=False, index=True)
+    
+    def __repr__(self):
+        return f'<PatientBlockingKey {self.key} -> {self.patient_id}>'
+
 class Appointment(db.Model):
+    # In production this table is range-partitioned by month on appointment_date
+    # (see manage_partitions.py); the ORM mapping is unchanged.
     __tablename__ = 'appointments'
     
     id = db.Column(db.Integer, primary_key=True)
@@ -60,15 +81,48 @@ class Appointment(db.Model):
     patient_name = db.Column(db.String(100), nullable=False)
     patient_email = db.Column(db.String(120))
     patient_phone = db.Column(db.String(20))
-    appointment_date = db.Column(db.Date, nullable=False)
+    # active_history: load the old value on change even if it was expired, so the
+    # live events (events.py) report the right old_status/old_date
+    appointment_date = db.column_property(db.Column(db.Date, nullable=False), active_history=True)
     appointment_time = db.Column(db.String(10), nullable=False)
     doctor = db.Column(db.String(50), nullable=False)
     department = db.Column(db.String(50))
     reason = db.Column(db.Text, nullable=False)
-    status = db.Column(db.String(20), default='pending')  # pending, confirmed, cancelled, completed
+    status = db.column_property(db.Column(db.String(20), default='pending'),  # pending, confirmed, cancelled, completed
+                                active_history=True)
     notes = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (db.Index('ix_appointments_updated_at_id', 'updated_at', 'id'),)
+    
     def __repr__(self):
         return f'<Appointment {self.patient_name} - {self.appointment_date}>'
+
+class ApiToken(db.Model):
+    # Bearer tokens for the JSON API; only a SHA-256 hash of the token is stored
+    __tablename__ = 'api_tokens'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)  # e.g. lab, billing
+    token_hash = db.Column(db.String(64), unique=True, nullable=False, index=True)
+    is_active = db.Column(db.Boolean, default=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_used_at = db.Column(db.DateTime)
+    
+    def __repr__(self):
+        return f'<ApiToken {self.name}>'
+
+class DeletedRecord(db.Model):
+    # Tombstones for API sync, written by the AFTER DELETE triggers from manage_api_tokens.py --setup
+    __tablename__ = 'deleted_records'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    table_name = db.Column(db.String(30), nullable=False)  # patients, appointments
+    record_id = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    __table_args__ = (db.Index('ix_deleted_records_table_deleted_at_id', 'table_name', 'deleted_at', 'id'),)
+    
+    def __repr__(self):
+        return f'<DeletedRecord {self.table_name} {self.record_id}>'
@@ -0,0 +1,58 @@
+from sqlalchemy import text
+
+# Index helpers shared by the manage_*.py setup scripts (PostgreSQL only)
+
+
+def partitions_of(conn, table):
+    """Return partition names if table is partitioned, otherwise None."""
+    partitioned = conn.execute(text("""
+        SELECT 1 FROM pg_partitioned_table pt
+        JOIN pg_class c ON c.oid = pt.partrelid
+        WHERE c.relname = :name
+    """), {'name': table}).first()
+    if not partitioned:
+        return None
+    rows = conn.execute(text("""
+        SELECT c.relname FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+        WHERE p.relname = :name
+    """), {'name': table}).fetchall()
+    return [r[0] for r in rows]
+
+
+def create_index_concurrently(conn, table, suffix, definition):
+    """Build ix_<table>_<suffix> without blocking writes.
+
+    CREATE INDEX CONCURRENTLY is not allowed on a partitioned parent, so the
+    index is created ON ONLY the parent and each partition's index is built
+    concurrently and attached.
+    """
+    index = f'ix_{table}_{suffix}'
+    partitions = partitions_of(conn, table)
+    if partitions is None:
+        conn.execute(text(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index} ON {table} {definition}"
+        ))
+        return
+
+    conn.execute(text(
+        f"CREATE INDEX IF NOT EXISTS {index} ON ONLY {table} {definition}"
+    ))
+    # Partitions that already have an index attached (e.g. cloned when the parent
+    # index was created by manage_partitions.py --setup) are left alone
+    covered = set(conn.execute(text("""
+        SELECT t.relname FROM pg_inherits i
+        JOIN pg_class p ON p.oid = i.inhparent
+        JOIN pg_index x ON x.indexrelid = i.inhrelid
+        JOIN pg_class t ON t.oid = x.indrelid
+        WHERE p.relname = :parent
+    """), {'parent': index}).scalars().all())
+    for partition in partitions:
+        if partition in covered:
+            continue
+        child = f'ix_{partition}_{suffix}'
+        conn.execute(text(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {child} ON {partition} {definition}"
+        ))
+        conn.execute(text(f"ALTER INDEX {index} ATTACH PARTITION {child}"))
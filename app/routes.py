@@ -1,12 +1,23 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask import Blueprint, render_template, request, redirect, url_for, flash, Response, jsonify, current_app
 from flask_login import login_user, logout_user, login_required, current_user
+import time
 from datetime import datetime, date
 from . import db
 from .models import User, Patient, Appointment
+from .search import search_patients, search_appointments
+from .dedup import find_duplicates, index_patient
+from .listings import patient_rows, staff_rows, appointment_rows
 from sqlalchemy import text
+from .events import appointment_event, client_since
 
 main_bp = Blueprint('main', __name__)
 
+def login_throttle():
+    return current_app.extensions['login_throttle']
+
+def event_broker():
+    return current_app.extensions['event_broker']
+
 # ========== PUBLIC ROUTES ==========
 
 @main_bp.route('/')
@@ -77,9 +88,19 @@ def login():
         username = request.form.get('username')
         password = request.form.get('password')
         remember = True if request.form.get('remember') else False
+
+        # Reject throttled username/IP pairs before touching the database
+        wait = login_throttle().locked_for(username, request.remote_addr)
+        if wait:
+            flash(f'Too many failed login attempts. Try again in {(wait + 59) // 60} minute(s).', 'error')
+            return render_template('login.html'), 429
+
         user = User.query.filter_by(username=username).first()
+        if user is None:
+            login_throttle().dummy_check(password)
         if user and user.check_password(password):
             if user.is_active:
+                login_throttle().reset(username)
                 login_user(user, remember=remember)
                 user.last_login = datetime.utcnow()
                 db.session.commit()
@@ -88,6 +109,7 @@ def login():
             else:
                 flash('Your account has been deactivated. Contact admin.', 'error')
         else:
+            login_throttle().record_failure(username, request.remote_addr)
             flash('Invalid username or password.', 'error')
     return render_template('login.html')
 
@@ -103,6 +125,8 @@ def logout():
 @main_bp.route('/dashboard')
 @login_required
 def dashboard():
+    # Taken before the queries so the live stream resyncs if anything changes meanwhile
+    events_since = time.time()
     try:
         total_patients = Patient.query.count() or 0
         total_appointments = Appointment.query.count() or 0
@@ -123,7 +147,28 @@ def dashboard():
                          pending_appointments=pending_appointments,
                          today_appointments=today_appointments,
                          recent_appointments=recent_appointments,
+                         today=date.today().isoformat(),
+                         events_since=events_since,
                          current_user=current_user)  # ← Add this
+
+@main_bp.route('/events')
+@login_required
+def events():
+    # Server-Sent Events: live appointment/patient changes for the dashboard and pending queue
+    # The stream runs after the request context (and its DB session) is torn down,
+    # so an open connection never holds a pool slot for the life of the stream.
+    since = client_since(request.headers.get('Last-Event-ID'), request.args.get('since'))
+    subscriber = event_broker().subscribe(since)
+    if subscriber is None:
+        # Too many open streams in this process. An error status would make
+        # EventSource give up for good, so send an empty stream with a long retry.
+        body = event_broker().busy(since)
+    else:
+        body = event_broker().stream(subscriber)
+    response = Response(body, mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
                          
 
 # ========== PATIENTS ==========
@@ -133,14 +178,7 @@ def dashboard():
 def patients_list():
     try:
         search = request.args.get('search', '')
-        if search:
-            patients = Patient.query.filter(
-                (Patient.first_name.ilike(f'%{search}%')) |
-                (Patient.last_name.ilike(f'%{search}%')) |
-                (Patient.patient_id.ilike(f'%{search}%'))
-            ).order_by(Patient.created_at.desc()).all()
-        else:
-            patients = Patient.query.order_by(Patient.created_at.desc()).all()
+        patients = patient_rows(search)
         return render_template('patients_list.html', patients=patients, search=search)
     except Exception as e:
         flash(f'Error loading patients: {str(e)}', 'error')
@@ -151,14 +189,26 @@ def patients_list():
 def patients_add():
     if request.method == 'POST':
         try:
+            dob_str = request.form.get('date_of_birth')
+            dob = datetime.strptime(dob_str, '%Y-%m-%d').date() if dob_str else None
+
+            # Warn about likely duplicates unless the user already confirmed
+            if not request.form.get('confirm_new'):
+                duplicates = find_duplicates(request.form.get('first_name'),
+                                             request.form.get('last_name'),
+                                             dob,
+                                             request.form.get('phone'),
+                                             request.form.get('email'))
+                if duplicates:
+                    flash('This patient may already be registered. Please review the matches below.', 'warning')
+                    return render_template('patients_add.html', form=request.form, duplicates=duplicates)
+
             last_patient = Patient.query.order_by(Patient.id.desc()).first()
             if last_patient and last_patient.patient_id:
                 last_num = int(last_patient.patient_id.replace('P', ''))
                 patient_id = f'P{last_num + 1:05d}'
             else:
                 patient_id = 'P00001'
-            dob_str = request.form.get('date_of_birth')
-            dob = datetime.strptime(dob_str, '%Y-%m-%d').date() if dob_str else None
             patient = Patient(
                 patient_id=patient_id,
                 first_name=request.form.get('first_name'),
@@ -174,6 +224,7 @@ def patients_add():
                 allergies=request.form.get('allergies'),
                 medical_notes=request.form.get('medical_notes')
             )
+            index_patient(patient)
             db.session.add(patient)
             db.session.commit()
             flash(f'Patient {patient.first_name} {patient.last_name} added successfully! (ID: {patient_id})', 'success')
@@ -181,7 +232,8 @@ def patients_add():
         except Exception as e:
             db.session.rollback()
             flash(f'Error adding patient: {str(e)}', 'error')
-    return render_template('patients_add.html')
+            return render_template('patients_add.html', form=request.form, duplicates=[])
+    return render_template('patients_add.html', form={}, duplicates=[])
 
 @main_bp.route('/patients/view/<int:id>')
 @login_required
@@ -214,6 +266,7 @@ def patients_edit(id):
             patient.allergies = request.form.get('allergies')
             patient.medical_notes = request.form.get('medical_notes')
             patient.updated_at = datetime.utcnow()
+            index_patient(patient)
             db.session.commit()
             flash(f'Patient {patient.first_name} {patient.last_name} updated successfully!', 'success')
             return redirect(url_for('main.patients_view', id=id))
@@ -241,26 +294,26 @@ def patients_delete(id):
 @main_bp.route('/appointments')
 @login_required
 def appointments_list():
+    events_since = time.time()
     try:
         status_filter = request.args.get('status', '')
         date_filter = request.args.get('date', '')
-        query = Appointment.query
-        if status_filter:
-            query = query.filter_by(status=status_filter)
+        filter_date = None
         if date_filter:
             try:
                 filter_date = datetime.strptime(date_filter, '%Y-%m-%d').date()
-                query = query.filter_by(appointment_date=filter_date)
             except:
                 pass
-        appointments = query.order_by(Appointment.appointment_date.desc(), Appointment.appointment_time.desc()).all()
+        appointments = appointment_rows(status_filter, filter_date)
         return render_template('appointments_list.html', 
                              appointments=appointments,
                              status_filter=status_filter,
-                             date_filter=date_filter)
+                             date_filter=date_filter,
+                             events_since=events_since)
     except Exception as e:
         flash(f'Error loading appointments: {str(e)}', 'error')
-        return render_template('appointments_list.html', appointments=[], status_filter='', date_filter='')
+        return render_template('appointments_list.html', appointments=[], status_filter='', date_filter='',
+                               events_since=events_since)
 
 @main_bp.route('/appointments/book', methods=['GET', 'POST'])
 @login_required
@@ -314,11 +367,32 @@ def appointments_view(id):
     try:
         appointment = Appointment.query.get_or_404(id)
         patient = Patient.query.get(appointment.patient_id)
-        return render_template('appointments_view.html', appointment=appointment, patient=patient)
+        suggestions = []
+        if patient is None and appointment.patient_name:
+            # Public bookings are never linked automatically; staff confirm a suggested match
+            first, _, last = appointment.patient_name.strip().partition(' ')
+            suggestions = find_duplicates(first, last, phone=appointment.patient_phone,
+                                          email=appointment.patient_email)[:5]
+        return render_template('appointments_view.html', appointment=appointment, patient=patient,
+                               suggestions=suggestions)
     except Exception as e:
         flash(f'Error: {str(e)}', 'error')
         return redirect(url_for('main.appointments_list'))
 
+@main_bp.route('/appointments/link/<int:id>', methods=['POST'])
+@login_required
+def appointments_link(id):
+    try:
+        appointment = Appointment.query.get_or_404(id)
+        patient = Patient.query.get_or_404(int(request.form.get('patient_id', 0)))
+        appointment.patient_id = patient.id
+        db.session.commit()
+        flash(f'Appointment linked to {patient.patient_id} {patient.first_name} {patient.last_name}.', 'success')
+    except Exception as e:
+        db.session.rollback()
+        flash(f'Error: {str(e)}', 'error')
+    return redirect(url_for('main.appointments_view', id=id))
+
 @main_bp.route('/appointments/update-status/<int:id>', methods=['POST'])
 @login_required
 def appointments_update_status(id):
@@ -347,6 +421,100 @@ def appointments_delete(id):
         flash(f'Error deleting appointment: {str(e)}', 'error')
     return redirect(url_for('main.appointments_list'))
 
+BULK_ACTIONS = {
+    'confirm': 'confirmed',
+    'cancel': 'cancelled',
+    'complete': 'completed',
+    'delete': None,
+}
+BULK_MAX_IDS = 500
+
+@main_bp.route('/appointments/bulk', methods=['POST'])
+@login_required
+def appointments_bulk():
+    action = request.form.get('action', '')
+    ids = sorted({int(i) for i in request.form.getlist('ids') if i.isdigit()})
+    wants_json = request.accept_mimetypes.best == 'application/json'
+    back = url_for('main.appointments_list',
+                   status=request.form.get('status_filter') or None,
+                   date=request.form.get('date_filter') or None)
+
+    if action not in BULK_ACTIONS or not ids:
+        if wants_json:
+            return jsonify({'error': 'Choose an action and at least one appointment.'}), 400
+        flash('Select at least one appointment and an action.', 'error')
+        return redirect(back)
+    if len(ids) > BULK_MAX_IDS:
+        # Refuse rather than act on part of the selection
+        message = f'Select at most {BULK_MAX_IDS} appointments per bulk action ({len(ids)} selected).'
+        if wants_json:
+            return jsonify({'error': message}), 400
+        flash(message, 'error')
+        return redirect(back)
+
+    new_status = BULK_ACTIONS[action]
+    results = {appt_id: 'not_found' for appt_id in ids}
+    try:
+        # Lock the selected rows and read what the events/results need, then change
+        # them all with one set-based statement in the same transaction.
+        rows = db.session.execute(
+            db.select(Appointment.id, Appointment.status, Appointment.appointment_date,
+                      Appointment.appointment_time, Appointment.patient_name, Appointment.doctor)
+              .where(Appointment.id.in_(ids))
+              .with_for_update()
+        ).all()
+
+        if action == 'delete':
+            target = rows
+            if target:
+                db.session.execute(
+                    db.delete(Appointment).where(Appointment.id.in_([row.id for row in target])),
+                    execution_options={'synchronize_session': False}
+                )
+            outcome = 'deleted'
+        else:
+            target = [row for row in rows if row.status != new_status]
+            for row in rows:
+                results[row.id] = 'unchanged'
+            if target:
+                db.session.execute(
+                    db.update(Appointment)
+                      .where(Appointment.id.in_([row.id for row in target]))
+                      .values(status=new_status, updated_at=datetime.utcnow()),
+                    execution_options={'synchronize_session': False}
+                )
+            outcome = 'updated'
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        if wants_json:
+            return jsonify({'error': str(e)}), 500
+        flash(f'Error updating appointments: {str(e)}', 'error')
+        return redirect(back)
+
+    for row in target:
+        results[row.id] = outcome
+
+    # Keep live dashboards in step (PostgreSQL triggers do this on their own)
+    if action == 'delete':
+        event_broker().publish_local([appointment_event('DELETE', row) for row in target])
+    else:
+        event_broker().publish_local([
+            dict(appointment_event('UPDATE', row, old_status=row.status, old_date=row.appointment_date),
+                 status=new_status)
+            for row in target
+        ])
+
+    if wants_json:
+        return jsonify({'action': action, 'results': {str(k): v for k, v in results.items()}})
+
+    counts = {}
+    for value in results.values():
+        counts[value] = counts.get(value, 0) + 1
+    summary = ', '.join(f'{n} {label.replace("_", " ")}' for label, n in sorted(counts.items()))
+    flash(f'Bulk {action}: {summary}.', 'success' if len(target) else 'info')
+    return redirect(back)
+
 @main_bp.route('/reports')
 @login_required
 def reports():
@@ -419,6 +587,37 @@ def reports():
 
 
 
+# ========== SEARCH ==========
+
+@main_bp.route('/search')
+@login_required
+def search():
+    q = request.args.get('q', '').strip()
+    doctor = request.args.get('doctor', '')
+    date_from = request.args.get('date_from', '')
+    date_to = request.args.get('date_to', '')
+    patients = []
+    appointments = []
+    if q:
+        try:
+            start = datetime.strptime(date_from, '%Y-%m-%d').date() if date_from else None
+            end = datetime.strptime(date_to, '%Y-%m-%d').date() if date_to else None
+            patients = search_patients(q, date_from=start, date_to=end, doctor=doctor or None)
+            appointments = search_appointments(q, date_from=start, date_to=end, doctor=doctor or None)
+        except ValueError:
+            flash('Invalid date filter. Use YYYY-MM-DD.', 'error')
+        except Exception as e:
+            db.session.rollback()
+            flash(f'Error searching: {str(e)}', 'error')
+    return render_template('search.html',
+                           q=q,
+                           doctor=doctor,
+                           date_from=date_from,
+                           date_to=date_to,
+                           patients=patients,
+                           appointments=appointments)
+
+
 # ========== STAFF MANAGEMENT ==========
 
 @main_bp.route('/staff')
@@ -430,14 +629,7 @@ def staff_list():
     
     try:
         search = request.args.get('search', '')
-        if search:
-            staff = User.query.filter(
-                (User.full_name.ilike(f'%{search}%')) |
-                (User.username.ilike(f'%{search}%')) |
-                (User.email.ilike(f'%{search}%'))
-            ).order_by(User.created_at.desc()).all()
-        else:
-            staff = User.query.order_by(User.created_at.desc()).all()
+        staff = staff_rows(search)
         return render_template('staff_list.html', staff=staff, search=search)
     except Exception as e:
         flash(f'Error loading staff: {str(e)}', 'error')
@@ -0,0 +1,105 @@
+from markupsafe import Markup, escape
+from sqlalchemy import text
+from . import db
+
+# tsvector expressions kept in one place so the triggers and the backfill
+# command (manage_search.py) always index the same text.
+PATIENT_VECTOR_SQL = (
+    "setweight(to_tsvector('english', coalesce({row}allergies, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce({row}medical_notes, '')), 'B')"
+)
+APPOINTMENT_VECTOR_SQL = (
+    "setweight(to_tsvector('english', coalesce({row}reason, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce({row}notes, '')), 'B')"
+)
+
+# ts_headline markers; replaced with <mark> only after the snippet is escaped
+_START_SEL = '\x02'
+_STOP_SEL = '\x03'
+_HEADLINE_OPTS = f'StartSel={_START_SEL}, StopSel={_STOP_SEL}, MaxWords=30, MinWords=10, MaxFragments=2'
+
+RESULT_LIMIT = 50
+
+
+def highlight(snippet):
+    """Escape a ts_headline snippet and turn the match markers into <mark> tags."""
+    if not snippet:
+        return Markup('')
+    escaped = str(escape(snippet))
+    return Markup(escaped.replace(_START_SEL, '<mark>').replace(_STOP_SEL, '</mark>'))
+
+
+def _appointment_filters(alias, date_from, date_to, doctor, params):
+    clauses = []
+    if date_from:
+        clauses.append(f'{alias}.appointment_date >= :date_from')
+        params['date_from'] = date_from
+    if date_to:
+        clauses.append(f'{alias}.appointment_date <= :date_to')
+        params['date_to'] = date_to
+    if doctor:
+        clauses.append(f'{alias}.doctor = :doctor')
+        params['doctor'] = doctor
+    return clauses
+
+
+def search_appointments(query, date_from=None, date_to=None, doctor=None, limit=RESULT_LIMIT):
+    """Ranked appointment matches on reason/notes with highlighted snippets."""
+    params = {'q': query, 'limit': limit, 'opts': _HEADLINE_OPTS}
+    where = ['a.search_vector @@ q.query']
+    where += _appointment_filters('a', date_from, date_to, doctor, params)
+    # Rank and limit first, then build headlines only for the rows returned
+    rows = db.session.execute(text(f"""
+        SELECT top.id, top.patient_id, top.patient_name, top.appointment_date,
+               top.appointment_time, top.doctor, top.status, top.rank,
+               ts_headline('english', coalesce(top.reason, ''), q.query, :opts) AS reason_snippet,
+               ts_headline('english', coalesce(top.notes, ''), q.query, :opts) AS notes_snippet
+        FROM (
+            SELECT a.id, a.patient_id, a.patient_name, a.appointment_date, a.appointment_time,
+                   a.doctor, a.status, a.reason, a.notes,
+                   ts_rank_cd(a.search_vector, q.query) AS rank
+            FROM appointments a, websearch_to_tsquery('english', :q) AS q(query)
+            WHERE {' AND '.join(where)}
+            ORDER BY rank DESC, a.appointment_date DESC
+            LIMIT :limit
+        ) top, websearch_to_tsquery('english', :q) AS q(query)
+        ORDER BY top.rank DESC, top.appointment_date DESC
+    """), params).mappings().all()
+    return [dict(row,
+                 reason_snippet=highlight(row['reason_snippet']),
+                 notes_snippet=highlight(row['notes_snippet']))
+            for row in rows]
+
+
+def search_patients(query, date_from=None, date_to=None, doctor=None, limit=RESULT_LIMIT):
+    """Ranked patient matches on allergies/medical notes with highlighted snippets.
+
+    When a date range or doctor is given, only patients with a matching
+    appointment are returned.
+    """
+    params = {'q': query, 'limit': limit, 'opts': _HEADLINE_OPTS}
+    where = ['p.search_vector @@ q.query']
+    appt_filters = _appointment_filters('a', date_from, date_to, doctor, params)
+    if appt_filters:
+        where.append(
+            'EXISTS (SELECT 1 FROM appointments a WHERE a.patient_id = p.id AND '
+            + ' AND '.join(appt_filters) + ')'
+        )
+    rows = db.session.execute(text(f"""
+        SELECT top.id, top.patient_id, top.first_name, top.last_name, top.rank,
+               ts_headline('english', coalesce(top.allergies, ''), q.query, :opts) AS allergies_snippet,
+               ts_headline('english', coalesce(top.medical_notes, ''), q.query, :opts) AS notes_snippet
+        FROM (
+            SELECT p.id, p.patient_id, p.first_name, p.last_name, p.allergies, p.medical_notes,
+                   ts_rank_cd(p.search_vector, q.query) AS rank
+            FROM patients p, websearch_to_tsquery('english', :q) AS q(query)
+            WHERE {' AND '.join(where)}
+            ORDER BY rank DESC, p.id DESC
+            LIMIT :limit
+        ) top, websearch_to_tsquery('english', :q) AS q(query)
+        ORDER BY top.rank DESC, top.id DESC
+    """), params).mappings().all()
+    return [dict(row,
+                 allergies_snippet=highlight(row['allergies_snippet']),
+                 notes_snippet=highlight(row['notes_snippet']))
+            for row in rows]
@@ -0,0 +1,151 @@
+import os
+import sqlite3
+import time
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class LoginThrottle:
+    """Sliding-window login attempt tracker with progressive lockout.
+
+    Attempts are counted per username and per client IP in a small SQLite
+    file so every mod_wsgi process shares the same counters. Once a key is
+    locked out, login requests are rejected straight from this store without
+    querying PostgreSQL or hashing the submitted password.
+    """
+
+    def __init__(self, app=None):
+        self.path = None
+        self.window = 900
+        self.max_attempts = 5
+        self.base_lockout = 60
+        self.max_lockout = 3600
+        self._dummy_hash = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        # A file shared by every worker process; ':memory:' would give each connection its own empty store
+        app.config.setdefault('LOGIN_THROTTLE_PATH',
+                              os.path.join(app.instance_path, 'login_throttle.sqlite3'))
+        app.config.setdefault('LOGIN_THROTTLE_WINDOW', 900)          # seconds
+        app.config.setdefault('LOGIN_THROTTLE_MAX_ATTEMPTS', 5)
+        app.config.setdefault('LOGIN_THROTTLE_BASE_LOCKOUT', 60)     # seconds, doubles per lockout
+        app.config.setdefault('LOGIN_THROTTLE_MAX_LOCKOUT', 3600)    # seconds
+
+        self.path = app.config['LOGIN_THROTTLE_PATH']
+        self.window = app.config['LOGIN_THROTTLE_WINDOW']
+        self.max_attempts = app.config['LOGIN_THROTTLE_MAX_ATTEMPTS']
+        self.base_lockout = app.config['LOGIN_THROTTLE_BASE_LOCKOUT']
+        self.max_lockout = app.config['LOGIN_THROTTLE_MAX_LOCKOUT']
+
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS login_attempts (
+                    key TEXT NOT NULL,
+                    ts REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_login_attempts_key_ts ON login_attempts (key, ts)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS login_lockouts (
+                    key TEXT PRIMARY KEY,
+                    locked_until REAL NOT NULL,
+                    strikes INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+
+        app.extensions['login_throttle'] = self
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        return _Connection(conn)
+
+    @staticmethod
+    def _keys(username, ip):
+        keys = []
+        if username:
+            keys.append(f'user:{username.strip().lower()}')
+        if ip:
+            keys.append(f'ip:{ip}')
+        return keys
+
+    def locked_for(self, username, ip):
+        """Return the number of seconds the username or IP is still locked out (0 if not)."""
+        keys = self._keys(username, ip)
+        if not keys:
+            return 0
+        now = time.time()
+        placeholders = ','.join('?' * len(keys))
+        with self._connect() as conn:
+            row = conn.execute(
+                f"SELECT MAX(locked_until) FROM login_lockouts WHERE key IN ({placeholders})",
+                keys
+            ).fetchone()
+        until = row[0] if row and row[0] else 0
+        return max(0, int(until - now + 0.999))
+
+    def record_failure(self, username, ip):
+        """Record a failed attempt; lock out any key that exceeds the window limit."""
+        now = time.time()
+        cutoff = now - self.window
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute("DELETE FROM login_attempts WHERE ts < ?", (cutoff,))
+            # Strikes decay: a key that stayed clean for a full window after its lockout starts over
+            conn.execute("DELETE FROM login_lockouts WHERE locked_until < ?", (cutoff,))
+            for key in self._keys(username, ip):
+                conn.execute("INSERT INTO login_attempts (key, ts) VALUES (?, ?)", (key, now))
+                count = conn.execute(
+                    "SELECT COUNT(*) FROM login_attempts WHERE key = ? AND ts >= ?",
+                    (key, cutoff)
+                ).fetchone()[0]
+                if count < self.max_attempts:
+                    continue
+                row = conn.execute("SELECT strikes FROM login_lockouts WHERE key = ?", (key,)).fetchone()
+                strikes = (row[0] if row else 0) + 1
+                lockout = min(self.base_lockout * 2 ** (strikes - 1), self.max_lockout)
+                conn.execute("""
+                    INSERT INTO login_lockouts (key, locked_until, strikes) VALUES (?, ?, ?)
+                    ON CONFLICT(key) DO UPDATE SET locked_until = excluded.locked_until,
+                                                   strikes = excluded.strikes
+                """, (key, now + lockout, strikes))
+                conn.execute("DELETE FROM login_attempts WHERE key = ?", (key,))
+            conn.execute('COMMIT')
+
+    def reset(self, username):
+        """Clear counters and lockout history for a username after a successful login.
+
+        The IP counters are left alone: otherwise one valid account could be
+        used to reset the per-IP window while guessing other usernames.
+        """
+        keys = self._keys(username, None)
+        if not keys:
+            return
+        with self._connect() as conn:
+            conn.execute("DELETE FROM login_attempts WHERE key = ?", keys)
+            conn.execute("DELETE FROM login_lockouts WHERE key = ?", keys)
+
+    def dummy_check(self, password):
+        """Run a hash check against a fixed hash so unknown usernames cost the same as real ones."""
+        if self._dummy_hash is None:
+            self._dummy_hash = generate_password_hash(os.urandom(16).hex())
+        check_password_hash(self._dummy_hash, password or '')
+        return False
+
+
+class _Connection:
+    """Context manager that always closes the sqlite3 connection."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None and self.conn.in_transaction:
+            self.conn.rollback()
+        self.conn.close()
+        return False
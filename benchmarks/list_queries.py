@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+HealthClinic List Query Benchmark
+Compares the old full-entity list queries (Model.query...all()) with the
+column-projected queries in app/listings.py: time and peak Python memory per
+10k rows for the patients, staff and appointments lists.
+
+Usage:
+  python3 benchmarks/list_queries.py                 # Temporary SQLite database, 10000 rows per table
+  python3 benchmarks/list_queries.py ROWS [DB_URI]   # e.g. a scratch PostgreSQL database
+
+The benchmark DROPS AND RECREATES every application table (users, patients,
+appointments, ...) in DB_URI, fills them with generated rows and drops them
+again at the end. It refuses to run if any of those tables already holds
+rows, but only ever point it at a scratch database.
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect
+from app import create_app, db
+from app.models import User, Patient, Appointment
+from app.listings import patient_rows, staff_rows, appointment_rows
+
+RUNS = 5
+NOTE = 'Patient reports intermittent symptoms; follow-up recommended. ' * 20   # ~1.3 KB
+
+
+def non_empty_tables():
+    """Names of application tables in the target database that already contain rows."""
+    existing = set(inspect(db.engine).get_table_names())
+    return [table.name for table in db.metadata.sorted_tables
+            if table.name in existing
+            and db.session.execute(db.select(table).limit(1)).first() is not None]
+
+
+def populate(rows):
+    db.drop_all()
+    db.create_all()
+    now = datetime.utcnow()
+    db.session.execute(db.insert(User), [{
+        'username': f'user{i}', 'email': f'user{i}@healthclinic.local',
+        'password_hash': 'scrypt:32768:8:1$' + 'x' * 150, 'full_name': f'Staff Member {i}',
+        'role': ('doctor', 'nurse', 'admin', 'it')[i % 4], 'phone': '204-555-0100',
+        'is_active': True, 'created_at': now, 'last_login': now,
+    } for i in range(rows)])
+    db.session.execute(db.insert(Patient), [{
+        'patient_id': f'P{i:05d}', 'first_name': f'First{i}', 'last_name': f'Last{i}',
+        'date_of_birth': date(1980, 1, 1) + timedelta(days=i % 9000), 'gender': 'Female',
+        'phone': '204-555-0100', 'email': f'p{i}@example.com', 'address': '123 Main St\nWinnipeg MB',
+        'emergency_contact': 'Contact', 'emergency_phone': '204-555-0199', 'blood_type': 'O+',
+        'allergies': NOTE[:200], 'medical_notes': NOTE, 'created_at': now, 'updated_at': now,
+    } for i in range(rows)])
+    db.session.execute(db.insert(Appointment), [{
+        'patient_id': None, 'patient_name': f'First{i} Last{i}', 'patient_email': f'p{i}@example.com',
+        'patient_phone': '204-555-0100', 'appointment_date': date(2025, 1, 1) + timedelta(days=i % 365),
+        'appointment_time': '10:00', 'doctor': 'Dr. Sarah Johnson', 'department': 'General Practice',
+        'reason': NOTE[:300], 'status': 'pending', 'notes': NOTE, 'created_at': now, 'updated_at': now,
+    } for i in range(rows)])
+    db.session.commit()
+
+
+def measure(fn):
+    """Return (median seconds, median peak bytes) over RUNS fresh-session runs."""
+    times = []
+    peaks = []
+    for _ in range(RUNS):
+        db.session.remove()
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del result
+        times.append(elapsed)
+        peaks.append(peak)
+    return statistics.median(times), statistics.median(peaks)
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    tmp = None
+    if len(sys.argv) > 2:
+        uri = sys.argv[2]
+    else:
+        tmp = tempfile.NamedTemporaryFile(suffix='.sqlite', delete=False)
+        uri = f'sqlite:///{tmp.name}'
+
+    app = create_app(config={'SQLALCHEMY_DATABASE_URI': uri}, register_views=False)
+    cases = [
+        ('patients', lambda: Patient.query.order_by(Patient.created_at.desc()).all(), patient_rows),
+        ('staff', lambda: User.query.order_by(User.created_at.desc()).all(), staff_rows),
+        ('appointments',
+         lambda: Appointment.query.order_by(Appointment.appointment_date.desc(),
+                                            Appointment.appointment_time.desc()).all(),
+         appointment_rows),
+    ]
+
+    with app.app_context():
+        occupied = non_empty_tables()
+        if occupied:
+            print(f"❌ Refusing to drop tables that contain data: {', '.join(occupied)}")
+            print("   Use an empty scratch database.")
+            sys.exit(1)
+        print(f"\nFilling {rows} rows per table ({db.engine.url.get_backend_name()})...")
+        populate(rows)
+        scale = 10000 / rows
+
+        print("\n" + "="*80)
+        print(f"LIST QUERIES — per 10k rows, median of {RUNS} runs")
+        print("="*80)
+        print(f"{'List':<14} {'Approach':<12} {'Time (ms)':>12} {'Peak mem (MB)':>15} {'Speedup':>10} {'Mem saved':>10}")
+        print("-"*80)
+        for name, full, projected in cases:
+            full_t, full_m = measure(full)
+            proj_t, proj_m = measure(projected)
+            print(f"{name:<14} {'entities':<12} {full_t * 1000 * scale:>12.1f} {full_m * scale / 1e6:>15.2f}")
+            print(f"{'':<14} {'projected':<12} {proj_t * 1000 * scale:>12.1f} {proj_m * scale / 1e6:>15.2f}"
+                  f" {full_t / proj_t:>9.1f}x {100 * (1 - proj_m / full_m):>9.0f}%")
+        print("-"*80 + "\n")
+        db.session.remove()
+        db.drop_all()
+
+    if tmp is not None:
+        os.unlink(tmp.name)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+HealthClinic Startup Benchmark
+Measures cold start of the app factory with `python -X importtime` in fresh
+interpreters, the way a mod_wsgi worker restart or a create_user.py run
+pays it.
+
+Usage:
+  python3 benchmarks/startup_importtime.py            # 5 runs per scenario, top 15 imports
+  python3 benchmarks/startup_importtime.py RUNS TOP
+
+Scenarios:
+  web   create_app()                       (what healthclinic.wsgi does)
+  cli   create_app(register_views=False)   (what the command-line scripts do)
+
+No database connection is made; engines connect lazily.
+"""
+
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = {
+    'web': 'from app import create_app; create_app()',
+    'cli': 'from app import create_app; create_app(register_views=False)',
+}
+
+LINE_RE = re.compile(r'import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+TIMER = (
+    'import time; _t = time.perf_counter(); {code}; '
+    'import sys; sys.stdout.write(str((time.perf_counter() - _t) * 1000))'
+)
+
+
+def run_once(code):
+    """Run code in a fresh interpreter. Returns (wall_ms, {module: cumulative_us})."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', TIMER.format(code=code)],
+        cwd=PROJECT_DIR, capture_output=True, text=True, check=True,
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        match = LINE_RE.match(line)
+        if match:
+            modules[match.group(4)] = int(match.group(2))
+    return float(result.stdout.strip().splitlines()[-1]), modules
+
+
+def report(name, code, runs, top):
+    walls = []
+    cumulative = {}
+    for _ in range(runs):
+        wall, modules = run_once(code)
+        walls.append(wall)
+        for module, us in modules.items():
+            cumulative.setdefault(module, []).append(us)
+
+    print("\n" + "="*80)
+    print(f"SCENARIO: {name}    {code}")
+    print("="*80)
+    print(f"create_app wall time: median {statistics.median(walls):.1f} ms, "
+          f"min {min(walls):.1f} ms, max {max(walls):.1f} ms over {runs} runs")
+    print(f"modules imported:     {len(cumulative)}")
+    print("-"*80)
+    print(f"{'Module':<50} {'Cumulative (ms, median)':>25}")
+    print("-"*80)
+    medians = sorted(((statistics.median(v) / 1000, m) for m, v in cumulative.items()), reverse=True)
+    for ms, module in medians[:top]:
+        print(f"{module:<50} {ms:>25.1f}")
+    print("-"*80)
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    top = int(sys.argv[2]) if len(sys.argv) > 2 else 15
+    for name, code in SCENARIOS.items():
+        report(name, code, runs, top)
+    print()
+
+
+if __name__ == '__main__':
+    main()